@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 import os
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 from datetime import timedelta
+from urllib.parse import urlsplit
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.metrics.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -76,17 +78,36 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# In-process cache of users authenticated by JWT (blog.authentication.CachedJWTAuthentication), invalidated through
+# a version key in the default cache. Other workers see the invalidation only when CACHE_LOCATION shares the cache.
+
+JWT_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'blog.throttling.UserTokenBucketThrottle',
+        'blog.throttling.IPTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'likes_user': os.environ.get('THROTTLE_LIKES_USER', '120/min'),
+        'likes_ip': os.environ.get('THROTTLE_LIKES_IP', '600/min'),
+        'posts_user': os.environ.get('THROTTLE_POSTS_USER', '30/min'),
+        'posts_ip': os.environ.get('THROTTLE_POSTS_IP', '120/min'),
+        'register_ip': os.environ.get('THROTTLE_REGISTER_IP', '20/hour'),
+    },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
@@ -94,6 +115,96 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Caches shared by all worker processes, given as memcached host:port in CACHE_LOCATION. Cached posts and their
+# invalidation only hold across workers with it; without it each process keeps its own local memory cache.
+# Throttling buckets (blog.throttling) use the 'throttle' cache, THROTTLE_CACHE_LOCATION or the same memcached.
+# Left local, every worker keeps its own buckets and clients get the rate once per worker.
+
+
+def shared_cache(location):
+    if not location:
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    return {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': location}
+
+
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+
+CACHES = {
+    'default': shared_cache(CACHE_LOCATION),
+    'throttle': shared_cache(os.environ.get('THROTTLE_CACHE_LOCATION', CACHE_LOCATION)),
+}
+
+# Anonymous post list/detail responses (blog.mixins.AnonymousCacheMixin)
+
+POSTS_CACHE_TIMEOUT = 60
+
+# Maximum number of items in one request to bulk endpoints
+
+BULK_MAX_BATCH_SIZE = 500
+
+# API request logging (blog.tracking.BufferedLoggingMixin)
+
+REQUEST_LOG = {
+    'ASYNC': os.environ.get('REQUEST_LOG_ASYNC', '1') == '1',
+    'QUEUE_SIZE': int(os.environ.get('REQUEST_LOG_QUEUE_SIZE', 10000)),
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'GET_SAMPLE_RATE': float(os.environ.get('REQUEST_LOG_GET_SAMPLE_RATE', 1.0)),
+}
+
+# Write-behind buffer for likes (blog.likebuffer.LikeBuffer). Pending likes wait in the PendingLike table until any
+# worker flushes them, so every worker shows them in is_fan and total_likes and a killed worker loses none.
+
+LIKE_BUFFER = {
+    'ENABLED': os.environ.get('LIKE_BUFFER_ENABLED') == '1',
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Serve read endpoints through async views (blog.async_views), enabled by backend.asgi
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
+# Trending posts scored by exponentially decayed likes (blog.trending), refreshed by update_trending_scores.
+# Likes committed up to COMMIT_MARGIN seconds after they were stamped are still counted.
+
+TRENDING = {
+    'HALF_LIFE': 6 * 60 * 60,
+    'MIN_SCORE': 0.01,
+    'SIZE': 50,
+    'COMMIT_MARGIN': 60,
+}
+
+# Approximate like counts for viral posts (blog.approximate), corrected by sync_likes_count
+
+APPROXIMATE_LIKES = {
+    'ENABLED': os.environ.get('APPROXIMATE_LIKES_ENABLED') == '1',
+    'THRESHOLD': 100000,
+    'STEP': 100,
+}
+
+# Rows per day of blog.models.DailyLikeStat that likes are spread over, so concurrent likes don't queue on one row
+
+DAILY_LIKE_STAT_SHARDS = 16
+
+# Home timelines pushed to followers on post creation (blog.timeline), trimmed to SIZE by trim_timelines.
+# Posts of users with more than FANOUT_LIMIT followers are pulled on read instead. One request writes at most
+# MAX_FANOUT_ROWS entries to followers' timelines, so a bulk import reaches followers with its newest posts only.
+
+TIMELINE = {
+    'SIZE': 800,
+    'FANOUT_LIMIT': int(os.environ.get('TIMELINE_FANOUT_LIMIT', 1000)),
+    'MAX_FANOUT_ROWS': 50000,
+    'BATCH_SIZE': 1000,
+}
+
+# Per-endpoint SQL query count and timings (blog.metrics.QueryMetricsMiddleware)
+
+QUERY_METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('QUERY_METRICS_SAMPLE_RATE', 0.1)),
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -118,15 +229,55 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# blog.db.postgresql adds connection health checks and an optional per-process pool (DB_POOL_MAX_SIZE).
+# Pooled connections go back to the pool after each request, so CONN_MAX_AGE defaults to 0 with the pool.
+
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'blog.db.postgresql',
         'NAME': os.environ['DB_NAME'],
         'USER': os.environ['DB_USER'],
         'PASSWORD': os.environ['DB_PASSWORD'],
         'HOST': os.environ['DB_HOST'],
         'PORT': os.environ['DB_PORT'],
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if DB_POOL_MAX_SIZE else 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+        } if DB_POOL_MAX_SIZE else None,
+    }
+}
+
+
+# Read replicas, given as comma separated host[:port][/name] addresses. Safe requests read from a random replica
+# unless the user wrote within STICKY_SECONDS, analytics reads from its own replica when DB_ANALYTICS is set.
+
+def replica_database(address):
+    parts = urlsplit('//' + address)
+    return {
+        **DATABASES['default'],
+        'HOST': parts.hostname,
+        'PORT': parts.port or DATABASES['default']['PORT'],
+        'NAME': parts.path.strip('/') or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
     }
+
+
+DB_REPLICAS = [address for address in os.environ.get('DB_REPLICAS', '').split(',') if address]
+for index, address in enumerate(DB_REPLICAS, 1):
+    DATABASES['replica{}'.format(index)] = replica_database(address)
+if os.environ.get('DB_ANALYTICS'):
+    DATABASES['analytics'] = replica_database(os.environ['DB_ANALYTICS'])
+
+DATABASE_ROUTERS = ['blog.db.routers.ReplicaRouter']
+
+DATABASE_ROUTING = {
+    'REPLICAS': ['replica{}'.format(index) for index in range(1, len(DB_REPLICAS) + 1)],
+    'ANALYTICS': 'analytics' if 'analytics' in DATABASES else None,
+    'STICKY_SECONDS': int(os.environ.get('DB_STICKY_SECONDS', 5)),
 }
 
 
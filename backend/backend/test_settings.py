@@ -0,0 +1,21 @@
+from .settings import *  # noqa: F401, F403
+
+# Tests run in one process against a local memory cache they can clear, even where CACHE_LOCATION is set.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+# Tests check where reads actually run against a replica alias mirroring the default database.
+
+DATABASES = {**DATABASES, 'replica': {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}}  # noqa: F405
+
+# Request logs are written before the response, so tests see them without waiting for a flush.
+
+REQUEST_LOG = {**REQUEST_LOG, 'ASYNC': False}  # noqa: F405
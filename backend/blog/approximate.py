@@ -0,0 +1,28 @@
+import random
+
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD': 100000,
+    'STEP': 100,
+}
+
+_random = random.Random()
+
+
+def get_setting(name):
+    return getattr(settings, 'APPROXIMATE_LIKES', {}).get(name, DEFAULTS[name])
+
+
+def is_approximate(count) -> bool:
+    return get_setting('ENABLED') and count >= get_setting('THRESHOLD')
+
+
+def sample_delta(count, delta) -> int:
+    # Above THRESHOLD a change is applied STEP times with probability 1 / STEP, so the expected count stays exact
+    # while the post row is written for one like in STEP. The standard error after n changes is sqrt(n * (STEP - 1)).
+    if not is_approximate(count):
+        return delta
+    step = get_setting('STEP')
+    return delta * step if _random.random() * step < 1 else 0
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .metrics import install_execute_wrapper
+        from .utils import clear_content_type_cache
+
+        post_migrate.connect(clear_content_type_cache)
+        connection_created.connect(install_execute_wrapper)
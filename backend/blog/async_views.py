@@ -0,0 +1,46 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            timer = getattr(request, 'query_metrics', None)
+            if timer is not None:
+                timer.start_serialize()
+            response.render()
+            if timer is not None:
+                timer.stop_serialize(response)
+        return response
+    finally:
+        close_old_connections()
+
+
+def as_async_view(view):
+    # Django 3.1 has no async ORM and runs sync views one at a time per process under ASGI
+    # (thread_sensitive=True). Running the view in the executor thread pool lets read requests overlap, while
+    # writes stay on the shared thread as they would without the wrapper.
+    run_view = sync_to_async(functools.partial(_run_view, view), thread_sensitive=False)
+    run_write_view = sync_to_async(functools.partial(_run_view, view), thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_view(request, *args, **kwargs)
+        return await run_write_view(request, *args, **kwargs)
+
+    return async_view
+
+
+def async_urlpatterns(patterns, names):
+    return [
+        URLPattern(pattern.pattern, as_async_view(pattern.callback), pattern.default_args, pattern.name)
+        if pattern.name in names else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,75 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+}
+
+VERSION_KEY = 'jwt:user:{}:version'
+
+
+def get_setting(name):
+    return getattr(settings, 'JWT_USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class UserCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get_version(self, user_id):
+        return cache.get_or_set(VERSION_KEY.format(user_id), lambda: uuid.uuid4().hex, None)
+
+    def get(self, user_id, version):
+        with self._lock:
+            try:
+                user, user_version, expires_at = self._users[user_id]
+            except KeyError:
+                return None
+            if user_version != version or expires_at <= time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+        return copy.deepcopy(user)
+
+    def set(self, user_id, user, version):
+        with self._lock:
+            self._users[user_id] = (copy.deepcopy(user), version, time.monotonic() + get_setting('TTL'))
+            self._users.move_to_end(user_id)
+            while len(self._users) > get_setting('MAX_SIZE'):
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        # The version is shared, so the user is reloaded by every process, not just this one.
+        cache.delete(VERSION_KEY.format(user_id))
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version = user_cache.get_version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, version)
+        return user
@@ -0,0 +1,40 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+LIST_VERSION_KEY = 'posts:list:version'
+DETAIL_VERSION_KEY = 'posts:detail:{}:version'
+
+
+def _get_version(key):
+    return cache.get_or_set(key, lambda: uuid.uuid4().hex, None)
+
+
+def _hash_uri(request):
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def get_list_key(request):
+    return 'posts:list:{}:{}'.format(_get_version(LIST_VERSION_KEY), _hash_uri(request))
+
+
+def get_detail_key(request, pk):
+    return 'posts:detail:{}:{}:{}'.format(pk, _get_version(DETAIL_VERSION_KEY.format(pk)), _hash_uri(request))
+
+
+def get_data(key):
+    return cache.get(key)
+
+
+def set_data(key, data):
+    cache.set(key, data, getattr(settings, 'POSTS_CACHE_TIMEOUT', 60))
+
+
+def invalidate_list():
+    cache.delete(LIST_VERSION_KEY)
+
+
+def invalidate_post(pk):
+    cache.delete_many([LIST_VERSION_KEY, DETAIL_VERSION_KEY.format(pk)])
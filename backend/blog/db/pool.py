@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.size = 0
+        self._condition = threading.Condition()
+        self._idle = []
+
+    def get(self, connect):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while not self._idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout('No connection available in {} seconds.'.format(self.timeout))
+                self._condition.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self.size += 1
+
+        try:
+            return connect()
+        except Exception:
+            self._release()
+            raise
+
+    def put(self, connection):
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def discard(self, connection):
+        self._release()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self.discard(connection)
+
+    def _release(self):
+        with self._condition:
+            self.size -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, max_size, timeout):
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(max_size, timeout)
+        return _pools[key]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,83 @@
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from ..pool import PoolTimeout, get_pool
+from .creation import DatabaseCreation
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    health_check_done = False
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool((self.alias, self.settings_dict['NAME']), options['MAX_SIZE'], options['TIMEOUT'])
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        created = []
+
+        def connect():
+            created.append(super(DatabaseWrapper, self).get_new_connection(conn_params))
+            return created[-1]
+
+        while True:
+            try:
+                connection = pool.get(connect)
+            except PoolTimeout as e:
+                raise Database.OperationalError(str(e))
+            if created or (not connection.closed and self.is_pooled_connection_usable(connection)):
+                return connection
+            pool.discard(connection)
+
+    def is_pooled_connection_usable(self, connection):
+        # Idle pooled connections may have been closed by a server restart or idle timeout, check them on checkout.
+        if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None:
+            return super()._close()
+
+        try:
+            if not self.connection.closed and self.connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                self.connection.rollback()
+        except Database.Error:
+            pass
+        if self.connection.closed or self.connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            pool.discard(self.connection)
+        else:
+            pool.put(self.connection)
+
+    def connect(self):
+        # New connections and connections taken from the pool are already known to be usable.
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        # Like CONN_HEALTH_CHECKS in Django 4.1: check a reused connection once per request, on first use.
+        if self.connection is not None and not self.health_check_done and not self.in_atomic_block:
+            if self.settings_dict.get('CONN_HEALTH_CHECKS') and not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
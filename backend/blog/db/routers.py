@@ -0,0 +1,79 @@
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'REPLICAS': (),
+    'ANALYTICS': None,
+    'STICKY_SECONDS': 5,
+}
+
+STICKY_COOKIE = 'primary_db'
+
+read_database = contextvars.ContextVar('read_database', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+@contextmanager
+def read_from(alias):
+    token = read_database.set(alias)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+def iterate_from(alias, iterable):
+    # Streamed responses are consumed after the view returned, so each item is read from the request's database.
+    iterator = iter(iterable)
+    while True:
+        with read_from(alias):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def pin_to_primary(response, user):
+    # The pin travels with the client in a signed cookie, so whichever worker serves the next request honours it.
+    response.set_signed_cookie(STICKY_COOKIE, str(user.pk), max_age=get_setting('STICKY_SECONDS'), httponly=True)
+
+
+def is_pinned_to_primary(request) -> bool:
+    if not request.user.is_authenticated:
+        return False
+    user_id = request.get_signed_cookie(STICKY_COOKIE, None, max_age=get_setting('STICKY_SECONDS'))
+    return user_id == str(request.user.pk)
+
+
+def get_read_database(request, alias=None):
+    if request.method not in SAFE_METHODS or is_pinned_to_primary(request):
+        return DEFAULT_DB_ALIAS
+    if alias:
+        return alias
+    replicas = get_setting('REPLICAS')
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_setting('REPLICAS') or db == get_setting('ANALYTICS'):
+            return False
+        return None
@@ -1,11 +1,46 @@
+import datetime
+
+from django.utils import timezone
 from django_filters import rest_framework as filters
 
-from .models import Like
+from . import search
+from .models import DailyLikeStat, Like, Post
+
+
+def _start_of_day(value):
+    return timezone.make_aware(datetime.datetime.combine(value, datetime.time.min))
 
 
 class LikeFilter(filters.FilterSet):
-    date = filters.DateFromToRangeFilter(field_name='created_at')
+    date_from = filters.DateFilter(method='filter_date_from')
+    date_to = filters.DateFilter(method='filter_date_to')
 
     class Meta:
         model = Like
-        fields = ('date', )
+        fields = ('date_from', 'date_to')
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(created_at__gte=_start_of_day(value))
+
+    def filter_date_to(self, queryset, name, value):
+        return queryset.filter(created_at__lt=_start_of_day(value + datetime.timedelta(days=1)))
+
+
+class DailyLikeStatFilter(filters.FilterSet):
+    date_from = filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = DailyLikeStat
+        fields = ('date_from', 'date_to')
+
+
+class PostFilter(filters.FilterSet):
+    search = filters.CharFilter(method='filter_search')
+
+    class Meta:
+        model = Post
+        fields = ('search', )
+
+    def filter_search(self, queryset, name, value):
+        return search.search(queryset, value)
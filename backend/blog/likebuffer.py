@@ -0,0 +1,143 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'LIKE_BUFFER', {}).get(name, DEFAULTS[name])
+
+
+def _get_pending(model, object_ids, user_id=None):
+    from .models import PendingLike
+
+    content_type = ContentType.objects.get_for_model(model)
+    pending = PendingLike.objects.filter(content_type=content_type, object_id__in=object_ids)
+    return pending if user_id is None else pending.filter(user_id=user_id)
+
+
+class LikeBuffer:
+    # Intents are kept in the PendingLike table until flushed, so every worker sees them and a killed one loses none.
+
+    def __init__(self):
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._recorded = 0
+        self._worker = None
+
+    def get(self, key):
+        model, object_id, user_id = key
+        return self.get_many(model, [object_id], user_id).get(object_id)
+
+    def get_many(self, model, object_ids, user_id) -> dict:
+        if not get_setting('ENABLED'):
+            return {}
+        return dict(_get_pending(model, object_ids, user_id).values_list('object_id', 'liked'))
+
+    def get_delta(self, model, object_id) -> int:
+        return self.get_deltas(model, [object_id]).get(object_id, 0)
+
+    def get_deltas(self, model, object_ids) -> dict:
+        if not get_setting('ENABLED'):
+            return {}
+        deltas = _get_pending(model, object_ids).order_by().values('object_id').annotate(
+            delta=Sum(Case(When(liked=True, then=Value(1)), default=Value(-1), output_field=IntegerField()))
+        )
+        return {row['object_id']: row['delta'] for row in deltas}
+
+    def record(self, key, liked, is_liked) -> bool:
+        from .models import PendingLike
+
+        model, object_id, user_id = key
+        with transaction.atomic():
+            pending = _get_pending(model, [object_id], user_id).select_for_update()
+            state = pending.values_list('liked', flat=True).first()
+            if state is not None:
+                if state == liked:
+                    return False
+                # Only state changes are kept, so unlike after a pending like drops both intents.
+                pending.delete()
+                return True
+            if is_liked() == liked:
+                return False
+            _, is_created = PendingLike.objects.get_or_create(
+                content_type=ContentType.objects.get_for_model(model), object_id=object_id, user_id=user_id,
+                defaults={'liked': liked},
+            )
+
+        with self._lock:
+            self._recorded += 1
+            size = self._recorded
+        if size >= get_setting('BATCH_SIZE'):
+            self._wakeup.set()
+        self._start()
+        return is_created
+
+    def discard(self, model, object_id):
+        _get_pending(model, [object_id]).delete()
+
+    def flush(self) -> bool:
+        with self._flush_lock:
+            with self._lock:
+                self._recorded = 0
+            while True:
+                is_written = self._write_batch(get_setting('BATCH_SIZE'))
+                if not is_written:
+                    return is_written is None
+
+    def _start(self):
+        if not get_setting('FLUSH_INTERVAL'):
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='like-buffer', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_setting('FLUSH_INTERVAL'))
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def _write_batch(self, limit):
+        from .models import PendingLike
+        from .utils import write_like_intents
+
+        batch = []
+        try:
+            with transaction.atomic():
+                # Workers flushing at the same time take different intents, each written and removed at once.
+                batch = list(PendingLike.objects.select_for_update(skip_locked=True).order_by('pk').values_list(
+                    'pk', 'content_type_id', 'object_id', 'user_id', 'liked'
+                )[:limit])
+                if not batch:
+                    return None
+                write_like_intents({
+                    (ContentType.objects.get_for_id(content_type_id).model_class(), object_id, user_id): liked
+                    for pk, content_type_id, object_id, user_id, liked in batch
+                })
+                PendingLike.objects.filter(pk__in=[pk for pk, *intent in batch]).delete()
+        except Exception:
+            self.failed += len(batch)
+            logger.exception('Failed to write %d buffered likes, they are retried on next flush.', len(batch))
+            return False
+        return True
+
+
+like_buffer = LikeBuffer()
+atexit.register(like_buffer.flush)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import utils
+from ...filters import DailyLikeStatFilter, LikeFilter
+from ...models import DailyLikeStat, Like
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyLikeStat rollup from the Like table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='First day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--date-to', help='Last day to rebuild (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        params = {'date_from': options['date_from'], 'date_to': options['date_to']}
+        likes = LikeFilter(params, queryset=Like.objects.all())
+        stats = DailyLikeStatFilter(params, queryset=DailyLikeStat.objects.all())
+        if not likes.is_valid():
+            raise CommandError(likes.errors.as_text())
+
+        days = utils.rebuild_daily_like_stats(likes.qs, stats.qs)
+        self.stdout.write(self.style.SUCCESS('Daily like stats rebuilt for {} days.'.format(days)))
@@ -0,0 +1,78 @@
+import datetime
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ... import utils
+from ...filters import LikeFilter
+from ...models import Like, Post
+
+User = get_user_model()
+
+SEED_OBJECT_ID = 2 ** 30
+
+
+class Command(BaseCommand):
+    help = 'Seed likes spread over a number of days and time 7-day analytics windows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', type=int, default=10_000_000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep seeded likes after benchmark.')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        self.seed(user, options['likes'], options['days'], options['batch_size'])
+        utils.rebuild_daily_like_stats()
+
+        client = APIClient()
+        date_to = timezone.localdate()
+        params = {'date_from': date_to - datetime.timedelta(days=6), 'date_to': date_to}
+
+        response = None
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            response = client.get(reverse('analytics'), params)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        scan_timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            window_likes = LikeFilter(params, queryset=Like.objects.all()).qs.count()
+            scan_timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write('Likes in table: {}'.format(Like.objects.count()))
+        self.report('Analytics endpoint, 7-day window', timings, '{} days returned'.format(len(response.data or [])))
+        self.report('Like.created_at range scan, 7-day window', scan_timings, '{} likes counted'.format(window_likes))
+
+        if not options['keep']:
+            Like.objects.filter(user=user).delete()
+            utils.rebuild_daily_like_stats()
+
+    def report(self, label, timings, result):
+        self.stdout.write('{}: median {:.2f} ms, max {:.2f} ms over {} runs, {}'.format(
+            label, statistics.median(timings), max(timings), len(timings), result
+        ))
+
+    def seed(self, user, total, days, batch_size):
+        # Seeded likes point to object ids far above real posts, so they only affect aggregated stats.
+        obj_type = ContentType.objects.get_for_model(Post)
+        now = timezone.now()
+        step = datetime.timedelta(days=days) / total
+        for offset in range(0, total, batch_size):
+            Like.objects.bulk_create(
+                Like(user=user, content_type=obj_type, object_id=SEED_OBJECT_ID + i)
+                for i in range(offset, min(offset + batch_size, total))
+            )
+            Like.objects.filter(user=user, created_at__gt=now).update(created_at=now - step * offset)
+            self.stdout.write('\rSeeded {} likes'.format(min(offset + batch_size, total)), ending='')
+        self.stdout.write('')
@@ -0,0 +1,121 @@
+import math
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from ... import approximate, utils
+from ...models import Like, Post
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'like-benchmark-'
+
+
+class Command(BaseCommand):
+    help = 'Compare approximate like counts of a viral post with exact COUNT(*) in read time, write time and error.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', type=int, default=200_000)
+        parser.add_argument('--writes', type=int, default=2_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Threads liking the post at once. Waits on its row lock show on PostgreSQL only.')
+        parser.add_argument('--keep', action='store_true', help='Keep seeded post, users and likes after benchmark.')
+
+    def handle(self, *args, **options):
+        owner, _ = User.objects.get_or_create(username='benchmark')
+        post = Post.objects.create(title='Like count benchmark', owner=owner, content='Content')
+        users = self.seed(post, options['likes'] + options['writes'], options['likes'], options['batch_size'])
+        likes = Like.objects.filter(content_type_id=utils.get_content_type_id(Post), object_id=post.pk)
+
+        try:
+            self.report('Exact COUNT(*)', self.time(likes.count, options['repeat']), likes.count())
+            counter = Post.objects.filter(pk=post.pk).values_list('likes_count', flat=True)
+            self.report('Stored counter', self.time(lambda: counter.get(), options['repeat']), counter.get())
+
+            # Modes alternate in rounds, so neither gains from running on a warmer or smaller table.
+            writes = users[options['likes']:]
+            rounds = 10
+            timings, elapsed, errors = {False: [], True: []}, {False: 0.0, True: 0.0}, {False: 0, True: 0}
+            for i in range(rounds * 2):
+                enabled = bool(i % 2)
+                batch = writes[i::rounds * 2]
+                with override_settings(APPROXIMATE_LIKES={'ENABLED': enabled}):
+                    before = Post.objects.get(pk=post.pk).likes_count
+                    batch_timings, batch_elapsed = self.time_writes(post, batch, options['concurrency'])
+                    errors[enabled] += Post.objects.get(pk=post.pk).likes_count - before - len(batch)
+                timings[enabled] += batch_timings
+                elapsed[enabled] += batch_elapsed
+            for label, enabled in (('exact', False), ('approximate', True)):
+                self.stdout.write(
+                    'Likes, {} count: median {:.3f} ms, {:.0f} likes/s with {} threads, counter error {:+d}'.format(
+                        label, statistics.median(timings[enabled]), len(timings[enabled]) / elapsed[enabled],
+                        options['concurrency'], errors[enabled]
+                    )
+                )
+            expected_error = math.sqrt(len(timings[True]) * (approximate.get_setting('STEP') - 1))
+            self.stdout.write('Expected standard error of approximate count: {:.0f} ({:.2%} of {})'.format(
+                expected_error, expected_error / likes.count(), likes.count()
+            ))
+        finally:
+            if not options['keep']:
+                likes.delete()
+                post.delete()
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+                utils.rebuild_daily_like_stats()
+
+    def seed(self, post, users_total, likes_total, batch_size):
+        User.objects.bulk_create(
+            (User(username='{}{}'.format(USERNAME_PREFIX, i)) for i in range(users_total)),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('pk')[:users_total])
+        content_type_id = utils.get_content_type_id(Post)
+        Like.objects.bulk_create(
+            (Like(user=user, content_type_id=content_type_id, object_id=post.pk) for user in users[:likes_total]),
+            batch_size=batch_size,
+        )
+        Post.objects.filter(pk=post.pk).update(likes_count=likes_total)
+        self.stdout.write('Seeded {} likes on post {}'.format(likes_total, post.pk))
+        return users
+
+    def time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def time_writes(self, post, users, concurrency):
+        timings = []
+        post.refresh_from_db(fields=['likes_count'])
+
+        def like(users):
+            try:
+                for user in users:
+                    start = time.perf_counter()
+                    utils.add_like(post, user)
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=like, args=(users[i::concurrency], )) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, time.perf_counter() - start
+
+    def report(self, label, timings, result):
+        self.stdout.write('{}: median {:.2f} ms, max {:.2f} ms over {} runs, {} likes'.format(
+            label, statistics.median(timings), max(timings), len(timings), result
+        ))
@@ -0,0 +1,109 @@
+import os
+import statistics
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from ... import utils
+from ...models import Post
+
+User = get_user_model()
+
+SERVERS = {
+    'wsgi': ('backend.wsgi:application', {'SERVER_MODE': 'wsgi'}),
+    'asgi-sync': ('backend.asgi:application', {'SERVER_MODE': 'asgi', 'ASYNC_VIEWS': '0'}),
+    'asgi': ('backend.asgi:application', {'SERVER_MODE': 'asgi', 'ASYNC_VIEWS': '1'}),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare req/s of read endpoints served by WSGI and by ASGI with sync and async views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default=','.join(SERVERS))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        names = options['servers'].split(',')
+        unknown = set(names) - set(SERVERS)
+        if unknown:
+            raise CommandError('Unknown servers: {}'.format(', '.join(sorted(unknown))))
+
+        paths = self.get_paths()
+        for name in names:
+            app, env = SERVERS[name]
+            server = self.start_server(app, env, options['port'], options['workers'])
+            try:
+                base_url = 'http://127.0.0.1:{}'.format(options['port'])
+                self.wait_for(server, base_url + paths[0])
+                count, timings = self.load(base_url, paths, options['concurrency'], options['duration'])
+            finally:
+                server.terminate()
+                server.wait()
+            timings.sort()
+            self.stdout.write('{}: {:.1f} req/s, median {:.2f} ms, p95 {:.2f} ms over {} requests'.format(
+                name, count / options['duration'], statistics.median(timings),
+                timings[int(len(timings) * 0.95)], count
+            ))
+
+    def get_paths(self):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        post = Post.objects.order_by('-pk').first()
+        if post is None:
+            post = Post.objects.create(title='Server benchmark', owner=user, content='Content')
+        utils.add_like(post, user)
+        return [
+            reverse('posts-list'),
+            reverse('posts-detail', args=(post.pk, )),
+            reverse('posts-fans', args=(post.pk, )),
+            reverse('analytics'),
+        ]
+
+    def start_server(self, app, env, port, workers):
+        return subprocess.Popen(
+            [
+                'gunicorn', '-c', 'gunicorn.conf.py', app,
+                '--bind', '127.0.0.1:{}'.format(port), '--workers', str(workers), '--access-logfile', os.devnull,
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+        )
+
+    def wait_for(self, server, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                urllib.request.urlopen(url).read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('Server did not start.')
+
+    def load(self, base_url, paths, concurrency, duration):
+        lock = threading.Lock()
+        timings = []
+        deadline = time.monotonic() + duration
+
+        def worker(offset):
+            i = offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                urllib.request.urlopen(base_url + paths[i % len(paths)]).read()
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    timings.append(elapsed)
+                i += 1
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+        return len(timings), timings
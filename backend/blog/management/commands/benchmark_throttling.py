@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from ...models import Post
+from ...throttling import (
+    IPTokenBucketThrottle, TokenBucketThrottle, UserTokenBucketThrottle,
+)
+from ...views import PostViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time token bucket throttle checks against a full like/unlike request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        post, _ = Post.objects.get_or_create(title='Throttling benchmark', owner=user, defaults={'content': 'Content'})
+        rates = TokenBucketThrottle.THROTTLE_RATES
+        TokenBucketThrottle.THROTTLE_RATES = {'likes_user': '1000000/s', 'likes_ip': '1000000/s'}
+        try:
+            check_timings = self.time_checks(user, options['checks'])
+            request_timings = self.time_requests(user, post, options['repeat'])
+        finally:
+            TokenBucketThrottle.THROTTLE_RATES = rates
+            cache.clear()
+            post.delete()
+
+        check = statistics.median(check_timings)
+        request = statistics.median(request_timings)
+        self.stdout.write('Throttle check (user + ip): median {:.1f} us over {} checks'.format(
+            check * 1000, len(check_timings)
+        ))
+        self.stdout.write('Like/unlike request: median {:.2f} ms over {} runs'.format(request, len(request_timings)))
+        self.stdout.write('Throttle overhead: {:.2%} of request time'.format(check / request))
+
+    def time_checks(self, user, checks):
+        request = Request(APIRequestFactory().post('/'))
+        request.user = user
+        view = PostViewSet(action='like')
+        throttles = [UserTokenBucketThrottle(), IPTokenBucketThrottle()]
+
+        timings = []
+        for _ in range(checks):
+            start = time.perf_counter()
+            for throttle in throttles:
+                throttle.allow_request(request, view)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def time_requests(self, user, post, repeat):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        timings = []
+        for i in range(repeat):
+            url = reverse('posts-like' if i % 2 == 0 else 'posts-unlike', args=(post.pk, ))
+            start = time.perf_counter()
+            client.post(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from ... import utils
+from ...models import Post
+
+
+class Command(BaseCommand):
+    help = 'Reconcile denormalized Post.likes_count with the actual number of likes.'
+
+    def handle(self, *args, **options):
+        fixed = utils.sync_likes_count(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS('Likes count fixed for {} posts.'.format(fixed)))
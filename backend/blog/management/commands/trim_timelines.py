@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ... import timeline
+
+
+class Command(BaseCommand):
+    help = 'Drop timeline entries beyond the newest TIMELINE["SIZE"] posts of each user.'
+
+    def handle(self, *args, **options):
+        deleted = timeline.trim_timelines()
+        self.stdout.write(self.style.SUCCESS('Deleted {} timeline entries.'.format(deleted)))
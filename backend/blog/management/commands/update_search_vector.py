@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from ... import search
+from ...models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recompute the full-text search vector of every post.'
+
+    def handle(self, *args, **options):
+        updated = search.update_search_vector(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS('Search vector updated for {} posts.'.format(updated)))
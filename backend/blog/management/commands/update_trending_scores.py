@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ... import trending
+
+
+class Command(BaseCommand):
+    help = 'Decay trending scores and add likes created since the previous run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute scores from scratch.')
+
+    def handle(self, *args, **options):
+        total = trending.update_trending_scores(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS('Trending scores kept for {} posts.'.format(total)))
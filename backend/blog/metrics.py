@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.1,
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'QUERY_METRICS', {}).get(name, DEFAULTS[name])
+
+
+class EndpointMetrics:
+    FIELDS = ('requests', 'queries', 'db_ms', 'serialize_ms', 'total_ms')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, queries, db_ms, serialize_ms, total_ms):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, dict.fromkeys(self.FIELDS + ('max_total_ms', ), 0))
+            stats['requests'] += 1
+            stats['queries'] += queries
+            stats['db_ms'] += db_ms
+            stats['serialize_ms'] += serialize_ms
+            stats['total_ms'] += total_ms
+            stats['max_total_ms'] = max(stats['max_total_ms'], total_ms)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+        for stats in endpoints.values():
+            for field in self.FIELDS[1:]:
+                stats['avg_' + field] = stats[field] / stats['requests']
+        return endpoints
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+class RequestTimer:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_start = None
+        self.serialize_db_time = 0.0
+        self.serialize_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def start_serialize(self):
+        self.serialize_start = time.perf_counter()
+        self.serialize_db_time = self.db_time
+
+    def stop_serialize(self, response=None):
+        if self.serialize_start is not None:
+            # Queries of lazily loaded fields are counted as database time only.
+            db_time = self.db_time - self.serialize_db_time
+            self.serialize_time += time.perf_counter() - self.serialize_start - db_time
+            self.serialize_start = None
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        timer = current_timer.get()
+        if timer is None or timer.serialize_start is not None:
+            return super().to_representation(instance)
+        timer.start_serialize()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timer.stop_serialize()
+
+
+# The timer follows the request into whichever thread runs its queries, including sync_to_async executors.
+current_timer = contextvars.ContextVar('query_metrics_timer', default=None)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class QueryMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= get_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+
+        timer = request.query_metrics = RequestTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if random.random() >= get_setting('SAMPLE_RATE'):
+            return await self.get_response(request)
+
+        timer = request.query_metrics = RequestTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    def finish(self, request, response, timer, total_time):
+        db_ms, serialize_ms, total_ms = timer.db_time * 1000, timer.serialize_time * 1000, total_time * 1000
+        response['Server-Timing'] = ', '.join((
+            'db;dur={:.2f};desc="{} queries"'.format(db_ms, timer.queries),
+            'serialize;dur={:.2f}'.format(serialize_ms),
+            'total;dur={:.2f}'.format(total_ms),
+        ))
+
+        match = request.resolver_match
+        endpoint = '{} {}'.format(request.method, match.view_name if match else 'unresolved')
+        endpoint_metrics.record(endpoint, timer.queries, db_ms, serialize_ms, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        timer = getattr(request, 'query_metrics', None)
+        if timer is not None and not response.is_rendered:
+            timer.start_serialize()
+            response.add_post_render_callback(timer.stop_serialize)
+        return response
@@ -1,11 +1,88 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from . import utils
-from .serializers import FanSerializer
+from . import caching, utils
+from .db import routers
+from .pagination import FanCursorPagination
+from .renderers import NDJSONRenderer
+from .serializers import (
+    BulkLikeSerializer, FanSerializer, get_requested_fields,
+)
+
+
+def get_bulk_items(request):
+    items = request.data
+    if not isinstance(items, list):
+        raise ValidationError({'detail': 'Expected a list of items.'})
+    if len(items) > settings.BULK_MAX_BATCH_SIZE:
+        raise ValidationError({'detail': 'Batch is limited to {} items.'.format(settings.BULK_MAX_BATCH_SIZE)})
+    return items
+
+
+class ReplicaRoutingMixin:
+    read_database_setting = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        alias = routers.get_setting(self.read_database_setting) if self.read_database_setting else None
+        self.read_database_token = routers.read_database.set(routers.get_read_database(request, alias))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if hasattr(self, 'read_database_token'):
+            routers.read_database.reset(self.read_database_token)
+            del self.read_database_token
+        if response.status_code < 400 and request.method not in SAFE_METHODS and request.user.is_authenticated:
+            routers.pin_to_primary(response, request.user)
+        return response
+
+
+class AnonymousCacheMixin:
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(caching.get_list_key(request), super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        key = caching.get_detail_key(request, kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return self.get_cached_response(key, super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, key, view, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        data = caching.get_data(key)
+        if data is not None:
+            return Response(data)
+
+        # A lagging replica would keep serving the stale page from cache, so cached responses are read from primary.
+        with routers.read_from(DEFAULT_DB_ALIAS):
+            response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            caching.set_data(key, response.data)
+        return response
 
 
 class LikedMixin:
+    throttle_scopes = {'like': 'likes', 'unlike': 'likes', 'bulk_likes': 'likes'}
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            objs = list(args[0])
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            fields = get_requested_fields(self.request)
+            if fields is None or 'is_fan' in fields:
+                context['liked_ids'] = utils.get_liked_ids(objs, self.request.user)
+            if fields is None or 'total_likes' in fields:
+                utils.prefetch_pending_likes(objs)
+            args = (objs, ) + args[1:]
+        return super().get_serializer(*args, **kwargs)
+
     @action(detail=True, methods=['POST'])
     def like(self, request, pk=None):
         obj = self.get_object()
@@ -18,9 +95,57 @@ class LikedMixin:
         utils.remove_like(obj, request.user)
         return Response()
 
-    @action(detail=True, methods=['GET'])
+    @action(detail=False, methods=['POST'], url_path='likes/bulk', permission_classes=(IsAuthenticated, ))
+    def bulk_likes(self, request):
+        results = []
+        actions = {}
+        for item in get_bulk_items(request):
+            serializer = BulkLikeSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({'status': 'invalid', 'errors': serializer.errors})
+            elif serializer.validated_data['id'] in actions:
+                results.append({'status': 'invalid', 'errors': {'id': ['Duplicate id in batch.']}})
+            else:
+                actions[serializer.validated_data['id']] = serializer.validated_data['action']
+                results.append(dict(serializer.validated_data))
+
+        objs = self.get_queryset().in_bulk(list(actions))
+        to_like = [objs[pk] for pk, act in actions.items() if act == 'like' and pk in objs]
+        to_unlike = [objs[pk] for pk, act in actions.items() if act == 'unlike' and pk in objs]
+        liked = utils.bulk_add_likes(to_like, request.user)
+        unliked = utils.bulk_remove_likes(to_unlike, request.user)
+
+        for result in results:
+            if 'id' not in result:
+                continue
+            if result['id'] not in objs:
+                result['status'] = 'not_found'
+            elif result['action'] == 'like':
+                result['status'] = 'liked' if result['id'] in liked else 'already_liked'
+            else:
+                result['status'] = 'unliked' if result['id'] in unliked else 'not_liked'
+        return Response({'results': results})
+
+    @action(
+        detail=True,
+        methods=['GET'],
+        pagination_class=FanCursorPagination,
+        renderer_classes=list(api_settings.DEFAULT_RENDERER_CLASSES) + [NDJSONRenderer],
+    )
     def fans(self, request, pk=None):
         obj = self.get_object()
         fans = utils.get_fans(obj)
-        serializer = FanSerializer(fans, many=True)
-        return Response(serializer.data)
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            rows = fans.order_by(*FanCursorPagination.ordering).iterator()
+            rows = routers.iterate_from(routers.read_database.get(), rows)
+            lines = (request.accepted_renderer.render_item(FanSerializer(fan).data) for fan in rows)
+            if isinstance(request._request, ASGIRequest):
+                # Django 3.1 iterates streamed content on the event loop under ASGI, where queries are refused,
+                # so the rows are read here instead.
+                lines = list(lines)
+            return StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
+
+        page = self.paginate_queryset(fans)
+        serializer = FanSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
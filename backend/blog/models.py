@@ -3,8 +3,13 @@ from django.contrib.contenttypes.fields import (
     GenericForeignKey, GenericRelation,
 )
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from . import approximate
+from .likebuffer import like_buffer
+from .search import SearchVectorIndex
+
 User = get_user_model()
 
 
@@ -13,12 +18,37 @@ class Like(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'user'], name='unique_like'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'created_at'], name='like_object_created_at_idx'),
+        ]
 
     def __str__(self):
         return '{} liked {} with ID {}'.format(self.user, self.content_type, self.content_object)
 
 
+class PendingLike(models.Model):
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    liked = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'user'], name='unique_pending_like'),
+        ]
+
+    def __str__(self):
+        return '{} {} {} with ID {}'.format(
+            self.user_id, 'likes' if self.liked else 'unlikes', self.content_type_id, self.object_id
+        )
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -26,10 +56,94 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     content = models.TextField()
     likes = GenericRelation(Like)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='post_created_at_id_idx'),
+            models.Index(fields=['owner', 'id'], name='post_owner_id_idx'),
+            SearchVectorIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        pending_likes = getattr(self, 'pending_likes', None)
+        if pending_likes is None:
+            pending_likes = like_buffer.get_delta(type(self), self.pk)
+        return self.likes_count + pending_likes
+
+    @property
+    def is_total_likes_approximate(self):
+        return approximate.is_approximate(self.likes_count)
+
+
+class DailyLikeStat(models.Model):
+    date = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    total_likes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'shard'], name='unique_daily_like_stat'),
+        ]
+
+    def __str__(self):
+        return '{}: {} likes'.format(self.date, self.total_likes)
+
+
+class TrendingScore(models.Model):
+    post = models.OneToOneField(Post, primary_key=True, related_name='trending_score', on_delete=models.CASCADE)
+    score = models.FloatField(db_index=True)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return '{}: {:.2f}'.format(self.post_id, self.score)
+
+
+class TrendingLike(models.Model):
+    # No foreign key, so deleting a like skips the collector. Rows of deleted likes age out with the others.
+    like_id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return str(self.like_id)
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(User, related_name='following', on_delete=models.CASCADE)
+    followee = models.ForeignKey(User, related_name='followers', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow'),
+        ]
+
+    def __str__(self):
+        return '{} follows {}'.format(self.follower, self.followee)
+
+
+class FollowerCount(models.Model):
+    user = models.OneToOneField(User, primary_key=True, related_name='follower_count', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return '{}: {} followers'.format(self.user, self.count)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, related_name='timeline_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='timeline_entries', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            # Also serves timeline reads as a range scan over (user, post) in descending post order.
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+
+    def __str__(self):
+        return '{} in timeline of {}'.format(self.post_id, self.user_id)
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PostCursorPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class FanCursorPagination(CursorPagination):
+    ordering = ('-liked_at', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
@@ -0,0 +1,8 @@
+from rest_framework.permissions import BasePermission
+
+from . import metrics
+
+
+class IsLocalRequest(BasePermission):
+    def has_permission(self, request, view):
+        return request.META.get('REMOTE_ADDR') in metrics.get_setting('ALLOWED_IPS')
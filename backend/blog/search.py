@@ -0,0 +1,35 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector,
+)
+from django.db import connection, models
+from django.db.models import Case, F, Q, Value, When
+
+SEARCH_VECTOR = SearchVector('title', weight='A') + SearchVector('content', weight='B')
+
+
+class SearchVectorIndex(GinIndex):
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def is_supported() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(queryset) -> int:
+    if not is_supported():
+        return 0
+    return queryset.update(search_vector=SEARCH_VECTOR)
+
+
+def search(queryset, terms):
+    if is_supported():
+        query = SearchQuery(terms)
+        queryset = queryset.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+    else:
+        rank = Case(When(title__icontains=terms, then=Value(1.0)), default=Value(0.5), output_field=models.FloatField())
+        queryset = queryset.filter(Q(title__icontains=terms) | Q(content__icontains=terms)).annotate(rank=rank)
+    return queryset.order_by('-rank', '-created_at', '-id')
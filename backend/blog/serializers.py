@@ -2,13 +2,19 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from . import utils
+from . import metrics, utils
 from .models import Post
 
 User = get_user_model()
 
 
-class PostSerializer(serializers.ModelSerializer):
+def get_requested_fields(request):
+    if request is None or request.method != 'GET' or 'fields' not in request.query_params:
+        return None
+    return {name.strip() for name in request.query_params['fields'].split(',')}
+
+
+class PostSerializer(metrics.TimedSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_fan = serializers.SerializerMethodField()
 
@@ -23,14 +29,42 @@ class PostSerializer(serializers.ModelSerializer):
             'content',
             'is_fan',
             'total_likes',
+            'is_total_likes_approximate',
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = get_requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    def update(self, instance, validated_data):
+        # Saving every field would write back likes_count read at the start of the request over concurrent likes.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
     def get_is_fan(self, obj):
+        liked_ids = self.context.get('liked_ids')
+        if liked_ids is not None:
+            return obj.id in liked_ids
         user = self.context.get('request').user
         return utils.is_fan(obj, user)
 
 
-class FanSerializer(serializers.ModelSerializer):
+class BulkLikeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=('like', 'unlike'))
+
+
+class TimelineQuerySerializer(serializers.Serializer):
+    before = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+
+class FanSerializer(metrics.TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -39,7 +73,7 @@ class FanSerializer(serializers.ModelSerializer):
         )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(metrics.TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=32,
         validators=[
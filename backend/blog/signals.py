@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, search, timeline, utils
+from .authentication import user_cache
+from .models import Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    caching.invalidate_post(instance.pk)
+
+
+# Counters of likes and follows removed by cascades, e.g. when a user is deleted, are adjusted before the rows go.
+
+@receiver(pre_delete, sender=Post)
+def remove_post_likes(sender, instance, **kwargs):
+    utils.remove_all_likes(instance)
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_likes(sender, instance, **kwargs):
+    utils.remove_user_likes(instance)
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_follows(sender, instance, **kwargs):
+    timeline.remove_user_follows(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'content'} & set(update_fields):
+        search.update_search_vector(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
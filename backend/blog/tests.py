@@ -1,11 +1,59 @@
 import datetime
-
+import math
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import (
+    IntegrityError, OperationalError, connection, connections, transaction,
+)
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase, APITransactionTestCase
-
-from .models import Post
+from rest_framework.response import Response
+from rest_framework.test import (
+    APIRequestFactory, APITestCase, APITransactionTestCase,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_tracking.models import APIRequestLog
+
+from . import approximate, timeline, trending, utils
+from .async_views import as_async_view
+from .authentication import CachedJWTAuthentication, user_cache
+from .db import routers
+from .db.pool import ConnectionPool, PoolTimeout
+from .db.postgresql.base import DatabaseWrapper as PooledDatabaseWrapper
+from .likebuffer import LikeBuffer, like_buffer
+from .metrics import RequestTimer, current_timer, endpoint_metrics
+from .models import (
+    DailyLikeStat, Follow, FollowerCount, Like, PendingLike, Post,
+    TimelineEntry, TrendingLike, TrendingScore,
+)
+from .serializers import PostSerializer
+from .throttling import TokenBucketThrottle, UserTokenBucketThrottle
+from .tracking import LogBuffer
+from .views import PostViewSet
 
 User = get_user_model()
 
@@ -20,6 +68,10 @@ class UserCreateAPITest(APITestCase):
         )
         test_user.save()
 
+    def setUp(self):
+        cache.clear()
+        caches['throttle'].clear()
+
     def test_create_user(self):
         """
         Ensure we can create a new user.
@@ -156,6 +208,10 @@ class JWTAPITest(APITestCase):
         )
         test_user.save()
 
+    def setUp(self):
+        cache.clear()
+        caches['throttle'].clear()
+
     def test_jwt_workflow(self):
         """
         Ensure user can sign up and receive JSON Web Token.
@@ -272,7 +328,7 @@ class PostsAPITest(APITransactionTestCase):
         """
         response = self.client.get(reverse('posts-detail', args='2') + 'fans/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
 
     def test_authorized_get_posts(self):
         """
@@ -475,14 +531,79 @@ class PostsAPITest(APITransactionTestCase):
 
         response = self.client.get(reverse('posts-detail', args='2') + 'fans/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
 
         response = self.client.post(reverse('posts-detail', args='2') + 'like/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         response = self.client.get(reverse('posts-detail', args='2') + 'fans/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_post_fans_pagination_and_streaming(self):
+        """
+        Ensure post fans are paged newest like first and can be streamed as NDJSON.
+        """
+        post = Post.objects.get(pk=2)
+        utils.add_like(post, User.objects.get(username='testuser'))
+        utils.add_like(post, User.objects.get(username='testuser2'))
+
+        response = self.client.get(reverse('posts-detail', args='2') + 'fans/', {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'username': 'testuser2'}])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'username': 'testuser'}])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(reverse('posts-detail', args='2') + 'fans/', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            b'{"username": "testuser2"}\n{"username": "testuser"}\n'
+        )
+
+    def test_authorized_get_posts_is_fan(self):
+        """
+        Ensure posts list marks only posts liked by authorized user.
+        """
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'testuser2', 'password': 'testpassword32'}, format='json'
+        )
+
+        token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION='JWT ' + token)
+
+        response = self.client.post(reverse('posts-detail', args='2') + 'like/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        is_fan = {post['id']: post['is_fan'] for post in response.data['results']}
+        self.assertEqual(is_fan, {1: False, 2: True})
+
+    def test_liked_ids_for_anonymous_user(self):
+        """
+        Ensure liked ids of anonymous user are resolved without queries.
+        """
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(utils.get_liked_ids(posts, AnonymousUser()), set())
+
+    def test_get_posts_with_cursor_pagination(self):
+        """
+        Ensure posts can be paged by cursor, newest first and without total count.
+        """
+        response = self.client.get(reverse('posts-list'), {'pagination': 'cursor', 'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse('count' in response.data)
+        self.assertEqual([post['id'] for post in response.data['results']], [2])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']], [1])
+        self.assertIsNone(response.data['next'])
 
 
 class AnalyticsAPITest(APITestCase):
@@ -568,3 +689,1576 @@ class AnalyticsAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data[0]['date'], datetime.date.today())
         self.assertEqual(response.data[0]['total_likes'], 3)
+
+    def test_analytics_date_range(self):
+        """
+        Ensure analytics endpoint return only days in requested range.
+        """
+        today = datetime.date.today()
+        for days_ago in range(10):
+            DailyLikeStat.objects.create(date=today - datetime.timedelta(days=days_ago), total_likes=days_ago + 1)
+
+        response = self.client.get(
+            reverse('analytics'),
+            {'date_from': today - datetime.timedelta(days=6), 'date_to': today - datetime.timedelta(days=1)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([day['total_likes'] for day in response.data], [7, 6, 5, 4, 3, 2])
+
+        response = self.client.get(reverse('analytics'), {'date_from': 'yesterday'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue('date_from' in response.data)
+
+
+class LikesCountTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.user2 = User.objects.create_user('testuser2', 'test2@example.com', 'testpassword32')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+
+    def test_likes_count_follows_likes(self):
+        """
+        Ensure likes_count is kept in sync by like and unlike.
+        """
+        utils.add_like(self.post, self.user)
+        utils.add_like(self.post, self.user)
+        utils.add_like(self.post, self.user2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 2)
+
+        utils.remove_like(self.post, self.user)
+        utils.remove_like(self.post, self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 1)
+
+    def test_add_like_ignores_duplicates(self):
+        """
+        Ensure add_like inserts a like only once and duplicates are rejected by database.
+        """
+        self.assertTrue(utils.add_like(self.post, self.user))
+        self.assertFalse(utils.add_like(self.post, self.user))
+        self.assertEqual(self.post.likes.count(), 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Like.objects.create(content_object=self.post, user=self.user)
+
+    def test_is_fan_uses_cached_content_type(self):
+        """
+        Ensure is_fan issues a single query once content type is cached.
+        """
+        utils.add_like(self.post, self.user)
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(1):
+            self.assertTrue(utils.is_fan(self.post, self.user))
+
+    def test_update_keeps_concurrent_likes(self):
+        """
+        Ensure updating a post doesn't overwrite likes_count changed since it was loaded.
+        """
+        post = Post.objects.get(pk=self.post.pk)
+        utils.add_like(self.post, self.user)
+        serializer = PostSerializer(post, data={'title': 'Edited post'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+
+        post.refresh_from_db()
+        self.assertEqual(post.title, 'Edited post')
+        self.assertEqual(post.total_likes, 1)
+
+    def test_sync_likes_count_command(self):
+        """
+        Ensure sync_likes_count command fixes drifted counters.
+        """
+        utils.add_like(self.post, self.user)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=42)
+
+        out = StringIO()
+        call_command('sync_likes_count', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 1)
+        self.assertIn('1 posts', out.getvalue())
+
+        call_command('sync_likes_count', stdout=out)
+        self.assertIn('0 posts', out.getvalue())
+
+
+@override_settings(LIKE_BUFFER={'ENABLED': True, 'FLUSH_INTERVAL': None})
+class LikeBufferTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.user2 = User.objects.create_user('testuser2', 'test2@example.com', 'testpassword32')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+        cls.post2 = Post.objects.create(title='Second post', owner=cls.user, content='Second post')
+
+    def tearDown(self):
+        like_buffer.flush()
+
+    def test_pending_likes_are_visible(self):
+        """
+        Ensure is_fan and total_likes see pending likes before flush.
+        """
+        self.assertTrue(utils.add_like(self.post, self.user))
+        self.assertFalse(utils.add_like(self.post, self.user))
+        self.assertTrue(utils.add_like(self.post, self.user2))
+
+        self.assertFalse(Like.objects.exists())
+        self.assertTrue(utils.is_fan(self.post, self.user))
+        self.assertEqual(utils.get_liked_ids([self.post, self.post2], self.user), {self.post.id})
+        self.assertEqual(Post.objects.get(pk=self.post.pk).total_likes, 2)
+
+        like_buffer.flush()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.likes_count, 2)
+        self.assertEqual(post.total_likes, 2)
+        self.assertEqual(post.likes.count(), 2)
+        self.assertEqual(utils.get_daily_likes()[0]['total_likes'], 2)
+
+    def test_like_unlike_pairs_collapse(self):
+        """
+        Ensure like followed by unlike of the same post is never written.
+        """
+        utils.add_like(self.post, self.user)
+        self.assertTrue(utils.remove_like(self.post, self.user))
+        self.assertFalse(utils.is_fan(self.post, self.user))
+        self.assertEqual(self.post.total_likes, 0)
+        self.assertFalse(PendingLike.objects.exists())
+
+    def test_pending_unlike(self):
+        """
+        Ensure pending unlike hides stored like and is flushed in a batch.
+        """
+        utils.bulk_add_likes([self.post, self.post2], self.user)
+        self.assertTrue(utils.remove_like(self.post, self.user))
+        self.assertTrue(utils.remove_like(self.post2, self.user))
+        self.assertFalse(utils.remove_like(self.post2, self.user))
+        self.assertFalse(utils.is_fan(self.post, self.user))
+        self.assertEqual(utils.get_liked_ids([self.post, self.post2], self.user), set())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).total_likes, 0)
+
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(set(Post.objects.values_list('likes_count', flat=True)), {0})
+        self.assertEqual(utils.get_daily_likes()[0]['total_likes'], 0)
+
+    def test_like_api(self):
+        """
+        Ensure like endpoint responds with pending like.
+        """
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('posts-like', args=(self.post.pk, )))
+        response = self.client.get(reverse('posts-detail', args=(self.post.pk, )))
+        self.assertTrue(response.data['is_fan'])
+        self.assertEqual(response.data['total_likes'], 1)
+
+    def test_deleted_post_discards_pending_likes(self):
+        """
+        Ensure pending likes of deleted post are not flushed.
+        """
+        utils.add_like(self.post, self.user)
+        self.client.force_authenticate(self.user)
+        self.client.delete(reverse('posts-detail', args=(self.post.pk, )))
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+
+    def test_failed_flush_is_retried(self):
+        """
+        Ensure likes of a failed flush stay pending and are written by the next flush.
+        """
+        utils.add_like(self.post, self.user)
+        with mock.patch('blog.utils.write_like_intents', side_effect=OperationalError):
+            self.assertFalse(like_buffer.flush())
+        self.assertEqual(like_buffer.failed, 1)
+        self.assertTrue(utils.is_fan(self.post, self.user))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).total_likes, 1)
+
+        self.assertTrue(like_buffer.flush())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).total_likes, 1)
+        self.assertTrue(Like.objects.filter(user=self.user).exists())
+        like_buffer.failed = 0
+
+    def test_pending_likes_shared_by_workers(self):
+        """
+        Ensure like buffered by another worker is seen and flushed by this one.
+        """
+        LikeBuffer().record((Post, self.post.pk, self.user.pk), True, lambda: False)
+        self.assertTrue(utils.is_fan(self.post, self.user))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).total_likes, 1)
+
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts-list'))
+        total_likes = {post['id']: post['total_likes'] for post in response.data['results']}
+        self.assertEqual(total_likes, {self.post.pk: 1, self.post2.pk: 0})
+        self.assertEqual(len([query for query in queries if 'blog_pendinglike' in query['sql']]), 2)
+
+        self.assertTrue(like_buffer.flush())
+        self.assertFalse(PendingLike.objects.exists())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes_count, 1)
+
+    def test_deleted_user_likes_discarded(self):
+        """
+        Ensure pending likes of deleted user are dropped instead of being written.
+        """
+        user = User.objects.create_user('testuser3', 'test3@example.com', 'testpassword')
+        post = Post.objects.create(title='Third post', owner=self.user2, content='Post of another user.')
+        utils.add_like(post, user)
+        self.assertEqual(Post.objects.get(pk=post.pk).total_likes, 1)
+
+        user.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).total_likes, 0)
+        self.assertFalse(PendingLike.objects.exists())
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+
+    def test_same_like_flushed_by_two_processes(self):
+        """
+        Ensure like flushed twice, as by buffers of two workers, is counted once.
+        """
+        for i in range(2):
+            utils.write_like_intents({(Post, self.post.pk, self.user.pk): True})
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes_count, 1)
+        self.assertEqual(utils.get_daily_likes()[0]['total_likes'], 1)
+
+        for i in range(2):
+            utils.write_like_intents({(Post, self.post.pk, self.user.pk): False})
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes_count, 0)
+        self.assertEqual(utils.get_daily_likes()[0]['total_likes'], 0)
+
+
+class DailyLikeStatTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.user2 = User.objects.create_user('testuser2', 'test2@example.com', 'testpassword32')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+        cls.post2 = Post.objects.create(title='Second post', owner=cls.user, content='Another post.')
+
+    def get_total_likes(self):
+        return [day['total_likes'] for day in utils.get_daily_likes()]
+
+    def test_daily_likes_follow_likes(self):
+        """
+        Ensure daily like stats are kept in sync by like, unlike and post deletion.
+        """
+        utils.add_like(self.post, self.user)
+        utils.add_like(self.post, self.user)
+        utils.add_like(self.post, self.user2)
+        utils.add_like(self.post2, self.user2)
+        self.assertEqual(self.get_total_likes(), [3])
+
+        utils.remove_like(self.post, self.user)
+        self.assertEqual(self.get_total_likes(), [2])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.delete(reverse('posts-detail', args=[self.post.pk]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get_total_likes(), [1])
+
+    def test_daily_likes_sharded(self):
+        """
+        Ensure daily likes spread over shards are summed per day.
+        """
+        with mock.patch('blog.utils.random.randrange', side_effect=[0, 3, 3]):
+            utils.add_like(self.post, self.user)
+            utils.add_like(self.post2, self.user)
+            utils.remove_like(self.post, self.user)
+        self.assertEqual(DailyLikeStat.objects.count(), 2)
+        self.assertEqual(self.get_total_likes(), [1])
+
+    def test_user_deletion_adjusts_counters(self):
+        """
+        Ensure likes removed along with deleted user are subtracted from like counts and daily stats.
+        """
+        user = User.objects.create_user('testuser3', 'test3@example.com', 'testpassword')
+        own_post = Post.objects.create(title='Third post', owner=user, content='Post of deleted user.')
+        utils.add_like(self.post, user)
+        utils.add_like(own_post, self.user2)
+        self.assertEqual(self.get_total_likes(), [2])
+
+        user.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.get_total_likes(), [0])
+
+    def test_backfill_daily_like_stats_command(self):
+        """
+        Ensure backfill_daily_like_stats command rebuilds stats from likes.
+        """
+        utils.add_like(self.post, self.user)
+        utils.add_like(self.post2, self.user)
+        DailyLikeStat.objects.update(total_likes=42)
+
+        out = StringIO()
+        call_command('backfill_daily_like_stats', stdout=out)
+        self.assertEqual(self.get_total_likes(), [2])
+        self.assertIn('1 days', out.getvalue())
+
+
+class JWTUserCacheTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user.refresh_from_db()
+        self.token = AccessToken.for_user(self.user)
+
+    def get_user(self):
+        return CachedJWTAuthentication().get_user(self.token)
+
+    def test_user_is_cached(self):
+        """
+        Ensure authenticated user is loaded from database only once.
+        """
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_user(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_user(), self.user)
+
+    def test_authorized_request_skips_users_table(self):
+        """
+        Ensure repeated authorized requests don't query users table.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(self.token))
+        self.client.get(reverse('posts-list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if User._meta.db_table in query['sql']])
+
+    def test_password_change_invalidates_cache(self):
+        """
+        Ensure cached user is reloaded after password change.
+        """
+        self.get_user()
+        self.user.set_password('newpassword')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.get_user().check_password('newpassword'))
+
+    def test_deactivation_invalidates_cache(self):
+        """
+        Ensure deactivated user can't authenticate with cached record.
+        """
+        self.get_user()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user()
+
+    def test_invalidation_reaches_other_processes(self):
+        """
+        Ensure user invalidated by another process isn't served from this process's cached record.
+        """
+        with tempfile.TemporaryDirectory() as location:
+            shared_caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                         'LOCATION': location}}
+            with override_settings(CACHES=shared_caches):
+                self.get_user()
+                User.objects.filter(pk=self.user.pk).update(is_active=False)
+                subprocess.run([sys.executable, '-c', '; '.join((
+                    'import django',
+                    'django.setup()',
+                    'from django.test.utils import override_settings',
+                    'from blog.authentication import UserCache',
+                    'override_settings(CACHES={!r}).enable()'.format(shared_caches),
+                    'UserCache().invalidate({})'.format(self.user.pk),
+                ))], cwd=settings.BASE_DIR, check=True)
+                with self.assertRaises(AuthenticationFailed):
+                    self.get_user()
+
+    @override_settings(JWT_USER_CACHE={'TTL': 0})
+    def test_cache_expires(self):
+        """
+        Ensure cached user expires after TTL.
+        """
+        self.get_user()
+        with self.assertNumQueries(1):
+            self.get_user()
+
+
+class PostsQueryCountTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        owners = [User.objects.create_user('owner{}'.format(i), 'owner{}@example.com'.format(i)) for i in range(5)]
+        Post.objects.bulk_create(
+            Post(title='Post {}'.format(i), owner=owners[i % len(owners)], content='Content') for i in range(100)
+        )
+        for post in Post.objects.all()[:10]:
+            utils.add_like(post, cls.user)
+
+    def setUp(self):
+        ContentType.objects.get_for_model(Post)
+
+    def assertListQueries(self, num):
+        for limit in (1, 20, 100):
+            with self.subTest(limit=limit), self.assertNumQueries(num):
+                response = self.client.get(reverse('posts-list'), {'limit': limit})
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list_queries(self):
+        """
+        Ensure posts list query count doesn't depend on page size.
+        """
+        self.assertListQueries(3)
+
+    def test_authorized_list_queries(self):
+        """
+        Ensure posts list query count doesn't depend on page size for authorized user.
+        """
+        self.client.force_authenticate(self.user)
+        self.assertListQueries(4)
+
+
+class RequestLogTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+
+    def test_log_buffer_drops_when_full(self):
+        """
+        Ensure log buffer is bounded, counts dropped logs and writes queued logs in batches.
+        """
+        buffer = LogBuffer(maxsize=2, batch_size=1, flush_interval=0)
+        buffer._start = lambda: None
+        for _ in range(3):
+            buffer.put(APIRequestLog(requested_at=timezone.now(), path='/', remote_addr='127.0.0.1', host='testserver'))
+        self.assertEqual(buffer.dropped, 1)
+
+        with self.assertNumQueries(2):
+            buffer.flush()
+        self.assertEqual(APIRequestLog.objects.count(), 2)
+
+    @override_settings(REQUEST_LOG={'ASYNC': False, 'GET_SAMPLE_RATE': 0})
+    def test_get_requests_sampling(self):
+        """
+        Ensure GET requests are sampled out while writes are still logged.
+        """
+        response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(APIRequestLog.objects.count(), 0)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('posts-list'), {'title': 'Test post', 'content': 'Testing'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(APIRequestLog.objects.count(), 1)
+
+
+class PostsCacheTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_list_is_cached(self):
+        """
+        Ensure anonymous posts list is served from cache until a post is created.
+        """
+        response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.data['count'], 1)
+
+        Post.objects.bulk_create([Post(title='Hidden post', owner=self.user, content='Not in cache yet.')])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.data['count'], 1)
+
+        Post.objects.create(title='Second post', owner=self.user, content='Another post.')
+        response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.data['count'], 3)
+
+    def test_anonymous_detail_is_invalidated_by_likes(self):
+        """
+        Ensure anonymous post detail is refreshed when post is liked, unliked or updated.
+        """
+        url = reverse('posts-detail', args=[self.post.pk])
+        self.assertEqual(self.client.get(url).data['total_likes'], 0)
+
+        utils.add_like(self.post, self.user)
+        self.assertEqual(self.client.get(url).data['total_likes'], 1)
+
+        utils.remove_like(self.post, self.user)
+        self.assertEqual(self.client.get(url).data['total_likes'], 0)
+
+        self.post.title = 'Updated post'
+        self.post.save()
+        self.assertEqual(self.client.get(url).data['title'], 'Updated post')
+
+    def test_authorized_requests_are_not_cached(self):
+        """
+        Ensure authorized user always gets fresh data with own is_fan.
+        """
+        self.client.get(reverse('posts-list'))
+        self.client.force_authenticate(self.user)
+        Post.objects.filter(pk=self.post.pk).update(title='Silently updated')
+        response = self.client.get(reverse('posts-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Silently updated')
+
+
+class BulkAPITest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+        cls.post2 = Post.objects.create(title='Second post', owner=cls.user, content='Another post.')
+
+    def test_unauthorized_bulk(self):
+        """
+        Ensure unauthorized user can't use bulk endpoints.
+        """
+        response = self.client.post(reverse('posts-bulk'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(reverse('posts-bulk-likes'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_create_posts(self):
+        """
+        Ensure authorized user can create posts in bulk with per-item results.
+        """
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('posts-bulk'),
+            [{'title': 'Bulk post', 'content': 'Bulk content'}, {'title': 'No content'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'invalid'])
+        self.assertTrue('content' in response.data['results'][1]['errors'])
+        self.assertEqual(Post.objects.filter(owner=self.user, title='Bulk post').count(), 1)
+
+    @override_settings(BULK_MAX_BATCH_SIZE=1)
+    def test_bulk_batch_size_limit(self):
+        """
+        Ensure bulk endpoints reject batches above limit and non-list payloads.
+        """
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('posts-bulk'), [{'title': 'A', 'content': 'A'}, {'title': 'B', 'content': 'B'}], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('posts-bulk-likes'), {'id': 1, 'action': 'like'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Like.objects.count(), 0)
+
+    def test_bulk_likes(self):
+        """
+        Ensure authorized user can like and unlike posts in bulk with per-item results.
+        """
+        utils.add_like(self.post2, self.user)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('posts-bulk-likes'),
+            [
+                {'id': self.post.pk, 'action': 'like'},
+                {'id': self.post2.pk, 'action': 'unlike'},
+                {'id': self.post.pk, 'action': 'unlike'},
+                {'id': 999, 'action': 'like'},
+                {'id': self.post.pk, 'action': 'share'},
+            ],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['liked', 'unliked', 'invalid', 'not_found', 'invalid']
+        )
+        self.post.refresh_from_db()
+        self.post2.refresh_from_db()
+        self.assertEqual((self.post.total_likes, self.post2.total_likes), (1, 0))
+        self.assertEqual([day['total_likes'] for day in utils.get_daily_likes()], [1])
+
+        response = self.client.post(
+            reverse('posts-bulk-likes'), [{'id': self.post.pk, 'action': 'like'}], format='json'
+        )
+        self.assertEqual(response.data['results'][0]['status'], 'already_liked')
+
+    def test_bulk_likes_conflicting_insert(self):
+        """
+        Ensure like inserted concurrently by another request isn't counted again by bulk like.
+        """
+        Like.objects.create(content_object=self.post, user=self.user)
+        self.assertEqual(utils.bulk_add_likes([self.post, self.post2], self.user), {self.post2.pk})
+        self.post.refresh_from_db()
+        self.post2.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post2.likes_count), (0, 1))
+        self.assertEqual([day['total_likes'] for day in utils.get_daily_likes()], [1])
+
+
+@override_settings(QUERY_METRICS={'SAMPLE_RATE': 1})
+class QueryMetricsTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+
+    def setUp(self):
+        cache.clear()
+        endpoint_metrics.reset()
+
+    def test_server_timing_header(self):
+        """
+        Ensure sampled responses carry query count and timings in Server-Timing header.
+        """
+        response = self.client.get(reverse('posts-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+    def test_serializer_time_counted(self):
+        """
+        Ensure building serializer data is counted as serialization time.
+        """
+        with mock.patch.object(PostSerializer, 'get_is_fan', lambda serializer, obj: time.sleep(0.05) or False):
+            self.client.get(reverse('posts-list'))
+        stats = endpoint_metrics.snapshot()['GET posts-list']
+        self.assertGreaterEqual(stats['serialize_ms'], 50)
+        self.assertLess(stats['db_ms'], 50)
+
+    def test_metrics_endpoint(self):
+        """
+        Ensure metrics endpoint aggregates requests per endpoint and is available only locally.
+        """
+        self.client.get(reverse('posts-list'))
+        self.client.get(reverse('posts-list'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.data['GET posts-list']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['queries'], 0)
+        self.assertEqual(stats['avg_queries'], stats['queries'] / 2)
+
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(QUERY_METRICS={'SAMPLE_RATE': 0})
+    def test_not_sampled_request(self):
+        """
+        Ensure requests outside of sample are not instrumented.
+        """
+        response = self.client.get(reverse('posts-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(endpoint_metrics.snapshot(), {})
+
+
+@mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {
+    'likes_user': '2/min', 'likes_ip': '4/min', 'posts_user': '1/min', 'register_ip': '1/hour',
+})
+class ThrottlingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.other_user = User.objects.create_user('otheruser', 'other@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+
+    def setUp(self):
+        cache.clear()
+        caches['throttle'].clear()
+
+    def like(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('posts-like', args=(self.post.pk, )))
+
+    def test_likes_throttled_per_user(self):
+        """
+        Ensure likes are throttled per user and throttled response carries Retry-After header.
+        """
+        self.assertEqual(self.like(self.user).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.like(self.user).status_code, status.HTTP_200_OK)
+
+        response = self.like(self.user)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+        self.assertEqual(self.like(self.other_user).status_code, status.HTTP_200_OK)
+
+    def test_likes_throttled_per_ip(self):
+        """
+        Ensure likes from different users are throttled by client IP.
+        """
+        self.like(self.user)
+        self.like(self.user)
+        self.assertEqual(self.like(self.other_user).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.like(self.other_user).status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(User.objects.create_user('newuser'))
+        response = self.client.post(reverse('posts-like', args=(self.post.pk, )))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_bucket_refills(self):
+        """
+        Ensure tokens are refilled over time.
+        """
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1000.0):
+            self.like(self.user)
+            self.like(self.user)
+            self.assertEqual(self.like(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1030.0):
+            self.assertEqual(self.like(self.user).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.like(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_post_creation_throttled(self):
+        """
+        Ensure post creation has its own scope and reads aren't throttled.
+        """
+        self.client.force_authenticate(self.user)
+        data = {'title': 'New post', 'content': 'Content'}
+        self.assertEqual(self.client.post(reverse('posts-list'), data).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(reverse('posts-list'), data).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.like(self.user).status_code, status.HTTP_200_OK)
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('posts-list')).status_code, status.HTTP_200_OK)
+
+    def test_registration_throttled(self):
+        """
+        Ensure registration is throttled per IP.
+        """
+        data = {'username': 'foobar', 'email': 'foobar@example.com', 'password': 'somepassword'}
+        self.assertEqual(self.client.post(reverse('users-create'), data).status_code, status.HTTP_201_CREATED)
+        data['username'] = 'foobaz'
+        response = self.client.post(reverse('users-create'), data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '3600')
+
+    def test_bulk_likes_charged_per_item(self):
+        """
+        Ensure bulk likes spend a token per item, and batch over bucket size leaves bucket in debt.
+        """
+        self.client.force_authenticate(self.user)
+        items = [{'id': self.post.pk, 'action': 'like'}]
+        response = self.client.post(reverse('posts-bulk-likes'), items * 2, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.like(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        caches['throttle'].clear()
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('posts-bulk-likes'), items * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.like(self.user)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_buckets_kept_in_throttle_cache(self):
+        """
+        Ensure buckets are kept in the dedicated throttle cache.
+        """
+        self.like(self.user)
+        key = 'throttle:likes:user:{}'.format(self.user.pk)
+        self.assertIsNotNone(caches['throttle'].get(key))
+        self.assertIsNone(cache.get(key))
+
+    def test_concurrent_requests_dont_overspend(self):
+        """
+        Ensure concurrent requests can't spend the same tokens.
+        """
+        # Cache connections are per thread, so the backend class is patched.
+        backend = type(caches['throttle'])
+        cache_get = backend.get
+
+        def slow_get(*args, **kwargs):
+            value = cache_get(*args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        request = APIRequestFactory().post('/')
+        request.user = self.user
+        view = PostViewSet(action='like')
+        with mock.patch.object(backend, 'get', autospec=True, side_effect=slow_get):
+            with ThreadPoolExecutor(8) as executor:
+                allowed = list(executor.map(
+                    lambda i: UserTokenBucketThrottle().allow_request(request, view), range(8)
+                ))
+        self.assertEqual(allowed.count(True), 2)
+
+
+class PostSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.title_match = Post.objects.create(title='Django tips', owner=cls.user, content='Some useful tips.')
+        cls.content_match = Post.objects.create(title='Weekly notes', owner=cls.user, content='Learning Django today.')
+        cls.other = Post.objects.create(title='Unrelated', owner=cls.user, content='Nothing to see here.')
+
+    def search(self, terms, **params):
+        response = self.client.get(reverse('posts-list'), {'search': terms, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_search_ranks_title_matches_first(self):
+        """
+        Ensure search returns matching posts ranked with title matches first.
+        """
+        response = self.search('django')
+        ids = [post['id'] for post in response.data['results']]
+        self.assertEqual(ids, [self.title_match.id, self.content_match.id])
+
+    def test_search_pagination(self):
+        """
+        Ensure search results are paginated.
+        """
+        response = self.search('django', limit=1)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.title_match.id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([post['id'] for post in response.data['results']], [self.content_match.id])
+
+    def test_search_follows_updates(self):
+        """
+        Ensure search reflects updated and bulk created posts.
+        """
+        self.other.content = 'Django is here now.'
+        self.other.save()
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('posts-bulk'), [{'title': 'Bulk django', 'content': 'Content'}], format='json')
+
+        response = self.search('django')
+        self.assertEqual(
+            {post['title'] for post in response.data['results']},
+            {'Django tips', 'Weekly notes', 'Unrelated', 'Bulk django'}
+        )
+        self.assertEqual(self.search('unrelated').data['count'], 1)
+
+
+@override_settings(TRENDING={'HALF_LIFE': 3600, 'MIN_SCORE': 0.01, 'SIZE': 50})
+class TrendingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user('testuser{}'.format(i)) for i in range(3)]
+        cls.posts = [
+            Post.objects.create(title='Post {}'.format(i), owner=cls.users[0], content='Content') for i in range(3)
+        ]
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def like(self, post, user, hours_ago=0):
+        utils.add_like(post, user)
+        Like.objects.filter(object_id=post.id, user=user).update(
+            created_at=self.now - datetime.timedelta(hours=hours_ago)
+        )
+
+    def get_scores(self):
+        return dict(TrendingScore.objects.values_list('post_id', 'score'))
+
+    def test_scores_decay(self):
+        """
+        Ensure likes are weighted by exponential decay of their age.
+        """
+        self.like(self.posts[0], self.users[0])
+        for user in self.users:
+            self.like(self.posts[1], user, hours_ago=2)
+
+        self.assertEqual(trending.update_trending_scores(self.now), 2)
+        scores = self.get_scores()
+        self.assertAlmostEqual(scores[self.posts[0].id], 1)
+        self.assertAlmostEqual(scores[self.posts[1].id], 0.75)
+
+    def test_incremental_update_matches_rebuild(self):
+        """
+        Ensure incremental update gives the same scores as rebuild and drops decayed posts.
+        """
+        self.like(self.posts[0], self.users[0], hours_ago=1)
+        self.like(self.posts[1], self.users[0], hours_ago=1)
+        self.like(self.posts[2], self.users[0], hours_ago=1)
+        trending.update_trending_scores(self.now - datetime.timedelta(minutes=30))
+        self.like(self.posts[1], self.users[1])
+        Like.objects.filter(object_id=self.posts[2].id).update(created_at=self.now - datetime.timedelta(hours=10))
+
+        trending.update_trending_scores(self.now)
+        incremental = self.get_scores()
+        trending.update_trending_scores(self.now, rebuild=True)
+        rebuilt = self.get_scores()
+
+        self.assertEqual(set(rebuilt), {self.posts[0].id, self.posts[1].id})
+        self.assertEqual(set(incremental), {self.posts[0].id, self.posts[1].id, self.posts[2].id})
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(incremental[post_id], score)
+
+        trending.update_trending_scores(self.now + datetime.timedelta(hours=10))
+        self.assertEqual(self.get_scores(), {})
+
+    def test_late_committed_like_counted_once(self):
+        """
+        Ensure like committed after update but stamped before it is counted by the next update, and only once.
+        """
+        self.like(self.posts[0], self.users[0], hours_ago=0.01)
+        trending.update_trending_scores(self.now)
+        self.like(self.posts[0], self.users[1], hours_ago=0.005)
+        self.like(self.posts[1], self.users[0], hours_ago=0.005)
+
+        later = self.now + datetime.timedelta(seconds=10)
+        trending.update_trending_scores(later)
+        incremental = self.get_scores()
+        trending.update_trending_scores(later, rebuild=True)
+        rebuilt = self.get_scores()
+
+        self.assertEqual(set(incremental), {self.posts[0].id, self.posts[1].id})
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(incremental[post_id], score)
+
+    def test_unlike_skips_counted_likes(self):
+        """
+        Ensure unlike deletes the like without collecting counted likes, which are pruned by a later update.
+        """
+        self.like(self.posts[0], self.users[0])
+        trending.update_trending_scores(self.now)
+        self.assertEqual(TrendingLike.objects.count(), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            utils.remove_like(self.posts[0], self.users[0])
+        self.assertEqual([query for query in queries if 'blog_trendinglike' in query['sql']], [])
+        self.assertEqual(TrendingLike.objects.count(), 1)
+
+        trending.update_trending_scores(self.now + datetime.timedelta(hours=1))
+        self.assertFalse(TrendingLike.objects.exists())
+
+    def test_trending_endpoint(self):
+        """
+        Ensure trending endpoint returns top posts by score.
+        """
+        self.like(self.posts[0], self.users[0], hours_ago=3)
+        self.like(self.posts[2], self.users[0])
+        self.like(self.posts[2], self.users[1], hours_ago=1)
+        trending.update_trending_scores(self.now)
+
+        response = self.client.get(reverse('posts-trending'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data], [self.posts[2].id, self.posts[0].id])
+
+        with override_settings(TRENDING={'SIZE': 1}), self.assertNumQueries(2):
+            response = self.client.get(reverse('posts-trending'))
+        self.assertEqual([post['id'] for post in response.data], [self.posts[2].id])
+
+
+class SparseFieldsTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='First post', owner=cls.user, content='First ever created post!')
+        utils.add_like(cls.post, cls.user)
+
+    def setUp(self):
+        ContentType.objects.get_for_model(Post)
+        self.client.force_authenticate(self.user)
+
+    def test_list_fields(self):
+        """
+        Ensure list returns only requested fields and skips is_fan query and content column.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts-list'), {'fields': 'id,title,unknown'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.post.id, 'title': 'First post'}])
+        self.assertFalse([query for query in queries if Like._meta.db_table in query['sql']])
+        self.assertFalse([query for query in queries if '"content"' in query['sql']])
+        self.assertFalse([query for query in queries if User._meta.db_table in query['sql']])
+
+    def test_detail_fields(self):
+        """
+        Ensure detail returns only requested fields and is_fan is still computed when requested.
+        """
+        response = self.client.get(reverse('posts-detail', args=(self.post.pk, )), {'fields': 'id,is_fan'})
+        self.assertEqual(response.data, {'id': self.post.id, 'is_fan': True})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts-detail', args=(self.post.pk, )), {'fields': 'total_likes'})
+        self.assertEqual(response.data, {'total_likes': 1})
+        self.assertFalse([query for query in queries if Like._meta.db_table in query['sql']])
+
+    def test_fields_ignored_on_write(self):
+        """
+        Ensure fields parameter doesn't limit writable fields.
+        """
+        response = self.client.post(
+            '{}?fields=id'.format(reverse('posts-list')), {'title': 'New post', 'content': 'Content'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['content'], 'Content')
+
+
+class AsyncViewsTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        self.post = Post.objects.create(title='First post', owner=self.user, content='First ever created post!')
+
+    def test_async_list_view(self):
+        """
+        Ensure async view runs sync view in executor thread and returns rendered response with counted queries.
+        """
+        view = as_async_view(PostViewSet.as_view({'get': 'list'}))
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = async_to_sync(view)(APIRequestFactory().get(reverse('posts-list')))
+        finally:
+            current_timer.reset(token)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_rendered)
+        self.assertEqual(response.data['results'][0]['id'], self.post.id)
+        self.assertGreater(timer.queries, 0)
+
+    def test_only_reads_run_in_executor(self):
+        """
+        Ensure async view runs safe methods in executor thread and writes in the shared sync thread.
+        """
+        threads = {}
+
+        def view(request):
+            threads[request.method] = threading.get_ident()
+            return HttpResponse()
+
+        for method in ('get', 'post'):
+            async_to_sync(as_async_view(view))(getattr(APIRequestFactory(), method)('/'))
+        self.assertNotEqual(threads['GET'], threading.get_ident())
+        self.assertEqual(threads['POST'], threading.get_ident())
+
+    def test_streamed_fans_under_asgi(self):
+        """
+        Ensure post fans can be streamed as NDJSON through the ASGI handler.
+        """
+        utils.add_like(self.post, self.user)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('posts-fans', args=(self.post.pk, )),
+            'query_string': b'format=ndjson',
+            'headers': [],
+            'server': ('testserver', 80),
+        }
+        async_to_sync(ASGIHandler())(scope, receive, send)
+        self.assertEqual(messages[0]['status'], status.HTTP_200_OK)
+        self.assertEqual(b''.join(message.get('body', b'') for message in messages[1:]), b'{"username": "testuser"}\n')
+
+
+class ConnectionPoolTest(APITestCase):
+    def connect(self):
+        return mock.Mock(closed=0)
+
+    def test_connections_reused(self):
+        """
+        Ensure returned connections are handed out again instead of opening new ones.
+        """
+        pool = ConnectionPool(max_size=2, timeout=0.1)
+        first = pool.get(self.connect)
+        pool.put(first)
+        self.assertIs(pool.get(self.connect), first)
+        self.assertEqual(pool.size, 1)
+
+    def test_max_size_timeout(self):
+        """
+        Ensure pool waits for a free connection and times out when exhausted.
+        """
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        first = pool.get(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.get(self.connect)
+
+        pool.discard(first)
+        self.assertTrue(first.close.called)
+        self.assertIsNot(pool.get(self.connect), first)
+
+    def test_failed_connect_frees_slot(self):
+        """
+        Ensure failed connection attempt doesn't use up pool size.
+        """
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        with self.assertRaises(OSError):
+            pool.get(mock.Mock(side_effect=OSError))
+        self.assertEqual(pool.size, 0)
+
+    def test_dead_idle_connection_replaced(self):
+        """
+        Ensure pooled connection closed by server while idle is discarded on checkout.
+        """
+        settings_dict = {
+            **connection.settings_dict, 'NAME': 'dead_idle_test', 'POOL': {'MAX_SIZE': 2, 'TIMEOUT': 0.05},
+            'CONN_HEALTH_CHECKS': True,
+        }
+        wrapper = PooledDatabaseWrapper(settings_dict, alias='pool_test')
+        pool = wrapper.get_pool()
+        dead = mock.Mock(closed=0)
+        dead.cursor.return_value.__enter__ = mock.Mock(side_effect=PooledDatabaseWrapper.Database.OperationalError)
+        dead.cursor.return_value.__exit__ = mock.Mock(return_value=False)
+        fresh = mock.Mock(closed=0)
+        pool.put(pool.get(lambda: dead))
+        try:
+            with mock.patch.object(PostgreSQLDatabaseWrapper, 'get_new_connection', return_value=fresh):
+                self.assertIs(wrapper.get_new_connection({}), fresh)
+            self.assertTrue(dead.close.called)
+            self.assertEqual(pool.size, 1)
+        finally:
+            pool.close()
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_pooled_database_connection(self):
+        """
+        Ensure database wrapper takes connections from pool and returns them on close.
+        """
+        settings_dict = {**connection.settings_dict, 'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05}}
+        first = type(connection)(settings_dict, alias='pool_test')
+        second = type(connection)(settings_dict, alias='pool_test')
+        try:
+            first.ensure_connection()
+            raw_connection = first.connection
+            with self.assertRaises(OperationalError):
+                second.ensure_connection()
+
+            first.close()
+            second.ensure_connection()
+            self.assertIs(second.connection, raw_connection)
+            self.assertTrue(second.is_usable())
+
+            # Server side termination of the idle pooled connection, as by a restart or idle timeout.
+            pid = raw_connection.get_backend_pid()
+            second.close()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+            with second.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            self.assertIsNot(second.connection, raw_connection)
+        finally:
+            first.close()
+            second.close()
+            first.get_pool().close()
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': ['replica1', 'replica2'], 'ANALYTICS': 'analytics'})
+class ReplicaRoutingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.other_user = User.objects.create_user('otheruser', 'other@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='Title', owner=cls.user, content='Content')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def get_request(self, method='get', user=None, cookies=None):
+        request = getattr(self.factory, method)('/')
+        request.user = user or AnonymousUser()
+        request.COOKIES = {name: morsel.value for name, morsel in (cookies or {}).items()}
+        return request
+
+    def test_safe_requests_read_from_replicas(self):
+        """
+        Ensure safe requests read from replicas and unsafe requests from primary.
+        """
+        self.assertIn(routers.get_read_database(self.get_request()), ['replica1', 'replica2'])
+        self.assertIn(routers.get_read_database(self.get_request('head', self.user)), ['replica1', 'replica2'])
+        self.assertEqual(routers.get_read_database(self.get_request('post', self.user)), 'default')
+        self.assertEqual(routers.get_read_database(self.get_request('delete', self.user)), 'default')
+
+    def test_user_sticks_to_primary_after_write(self):
+        """
+        Ensure user reads from primary for a while after a write, other users keep reading from replicas.
+        """
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('posts-like', args=(self.post.id, )))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Nothing is kept on the server, so a worker with its own empty cache sees the pin too.
+        cache.clear()
+
+        request = self.get_request(user=self.user, cookies=response.cookies)
+        self.assertEqual(routers.get_read_database(request), 'default')
+        request = self.get_request(user=self.other_user, cookies=response.cookies)
+        self.assertIn(routers.get_read_database(request), ['replica1', 'replica2'])
+        self.assertIn(routers.get_read_database(self.get_request(user=self.user)), ['replica1', 'replica2'])
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 10):
+            request = self.get_request(user=self.user, cookies=response.cookies)
+            self.assertIn(routers.get_read_database(request), ['replica1', 'replica2'])
+
+    def test_failed_write_keeps_replicas(self):
+        """
+        Ensure rejected write doesn't stick user to primary.
+        """
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('posts-list'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(routers.STICKY_COOKIE, response.cookies)
+
+    def test_analytics_pinned_replica(self):
+        """
+        Ensure analytics reads from its dedicated replica.
+        """
+        self.assertEqual(routers.get_read_database(self.get_request(), 'analytics'), 'analytics')
+        response = Response()
+        routers.pin_to_primary(response, self.user)
+        request = self.get_request(user=self.user, cookies=response.cookies)
+        self.assertEqual(routers.get_read_database(request, 'analytics'), 'default')
+
+    @override_settings(DATABASE_ROUTING={})
+    def test_without_replicas(self):
+        """
+        Ensure reads go to primary when no replicas are configured.
+        """
+        self.assertEqual(routers.get_read_database(self.get_request()), 'default')
+
+    def test_router(self):
+        """
+        Ensure router reads from database chosen for request, writes and migrates only primary.
+        """
+        router = routers.ReplicaRouter()
+        token = routers.read_database.set('replica2')
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica2')
+            self.assertEqual(router.db_for_write(Post), 'default')
+        finally:
+            routers.read_database.reset(token)
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertIsNone(router.allow_migrate('default', 'blog'))
+        self.assertFalse(router.allow_migrate('replica1', 'blog'))
+        self.assertFalse(router.allow_migrate('analytics', 'blog'))
+
+
+@override_settings(TIMELINE={'SIZE': 3, 'FANOUT_LIMIT': 2})
+class TimelineTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.author = User.objects.create_user('author', 'author@example.com', 'testpassword')
+        cls.other_user = User.objects.create_user('otheruser', 'other@example.com', 'testpassword')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def create_post(self, user, title='Title'):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse('posts-list'), {'title': title, 'content': 'Content'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(self.user)
+        return response.data['id']
+
+    def get_timeline(self, **params):
+        response = self.client.get(reverse('posts-timeline'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_follow(self):
+        """
+        Ensure user can follow and unfollow other users, but not themselves.
+        """
+        response = self.client.post(reverse('users-follow', args=(self.author.id, )))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.post(reverse('users-follow', args=(self.author.id, )))
+        self.assertEqual(Follow.objects.filter(follower=self.user, followee=self.author).count(), 1)
+        self.assertEqual(FollowerCount.objects.get(user=self.author).count, 1)
+
+        response = self.client.post(reverse('users-follow', args=(self.user.id, )))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('users-unfollow', args=(self.author.id, )))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(FollowerCount.objects.get(user=self.author).count, 0)
+
+    def test_posts_pushed_to_followers(self):
+        """
+        Ensure new posts are pushed to timelines of followers and author only.
+        """
+        timeline.follow(self.user, self.author)
+        post_id = self.create_post(self.author)
+        own_post_id = self.create_post(self.user)
+        self.create_post(self.other_user)
+
+        response = self.get_timeline()
+        self.assertEqual([post['id'] for post in response.data['results']], [own_post_id, post_id])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(TimelineEntry.objects.filter(post_id=post_id).count(), 2)
+
+    def test_timeline_single_range_lookup(self):
+        """
+        Ensure timeline reads entries with a single query ordered by post.
+        """
+        timeline.follow(self.user, self.author)
+        post_ids = [self.create_post(self.author) for i in range(2)]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(timeline.get_timeline(self.user), post_ids[::-1])
+        entry_queries = [query['sql'] for query in queries if TimelineEntry._meta.db_table in query['sql']]
+        self.assertEqual(len(entry_queries), 1)
+        self.assertIn('ORDER BY', entry_queries[0])
+
+    def test_pulled_authors_read_with_one_query(self):
+        """
+        Ensure timeline takes one more query only while user follows authors over fan-out limit.
+        """
+        timeline.follow(self.user, self.author)
+        self.create_post(self.author)
+        with self.assertNumQueries(2):
+            timeline.get_timeline(self.user)
+
+        for user in (self.other_user, User.objects.create_user('fan', 'fan@example.com', 'testpassword')):
+            timeline.follow(user, self.author)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(timeline.get_timeline(self.user)), 1)
+
+    def test_deleted_follower_uncounted(self):
+        """
+        Ensure deleting a user takes their follows off follower counts.
+        """
+        fan = User.objects.create_user('fan', 'fan@example.com', 'testpassword')
+        for user in (self.user, fan):
+            timeline.follow(user, self.author)
+        fan.delete()
+        self.assertEqual(FollowerCount.objects.get(user=self.author).count, 1)
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """
+        Ensure following adds recent posts to timeline and unfollowing removes them.
+        """
+        post_ids = [self.create_post(self.author) for i in range(4)]
+        timeline.follow(self.user, self.author)
+        self.assertEqual(timeline.get_timeline(self.user), post_ids[:0:-1])
+
+        timeline.unfollow(self.user, self.author)
+        self.assertEqual(timeline.get_timeline(self.user), [])
+
+    def test_pagination(self):
+        """
+        Ensure timeline pages continue before last returned post.
+        """
+        timeline.follow(self.user, self.author)
+        post_ids = [self.create_post(self.author) for i in range(3)]
+
+        response = self.get_timeline(limit=2)
+        self.assertEqual([post['id'] for post in response.data['results']], post_ids[:0:-1])
+        self.assertIn('before={}'.format(post_ids[1]), response.data['next'])
+
+        response = self.get_timeline(limit=2, before=post_ids[1])
+        self.assertEqual([post['id'] for post in response.data['results']], post_ids[:1])
+
+        response = self.client.get(reverse('posts-timeline'), {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_popular_author_pulled_on_read(self):
+        """
+        Ensure posts of users over fan-out limit are read from their posts instead of pushed.
+        """
+        for user in (self.user, self.other_user):
+            timeline.follow(user, self.author)
+        self.assertFalse(timeline.is_pulled(self.author.pk))
+        pushed_id = self.create_post(self.author)
+
+        timeline.follow(User.objects.create_user('fan', 'fan@example.com', 'testpassword'), self.author)
+        self.assertTrue(timeline.is_pulled(self.author.pk))
+        pulled_id = self.create_post(self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post_id=pulled_id).exclude(user=self.author).exists())
+
+        own_post_id = self.create_post(self.user)
+        response = self.get_timeline()
+        self.assertEqual([post['id'] for post in response.data['results']], [own_post_id, pulled_id, pushed_id])
+        self.assertEqual(timeline.get_timeline(self.user, before=pulled_id), [pushed_id])
+
+    def test_trim_timelines(self):
+        """
+        Ensure trimming keeps only newest entries of each timeline.
+        """
+        timeline.follow(self.user, self.author)
+        post_ids = [self.create_post(self.author) for i in range(5)]
+
+        out = StringIO()
+        call_command('trim_timelines', stdout=out)
+        self.assertIn('Deleted 4 timeline entries', out.getvalue())
+        self.assertEqual(timeline.get_timeline(self.user, limit=10), post_ids[:1:-1])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.author).count(), 3)
+
+    @override_settings(TIMELINE={'SIZE': 3, 'FANOUT_LIMIT': 2, 'MAX_FANOUT_ROWS': 2})
+    def test_fan_out_rows_bounded(self):
+        """
+        Ensure one fan-out writes at most MAX_FANOUT_ROWS follower entries, newest posts first.
+        """
+        for user in (self.user, self.other_user):
+            timeline.follow(user, self.author)
+        post_ids = [Post.objects.create(title='Title', owner=self.author, content='Content').pk for i in range(3)]
+        timeline.fan_out(self.author.pk, post_ids)
+        self.assertEqual(timeline.get_timeline(self.user), post_ids[2:])
+        self.assertEqual(timeline.get_timeline(self.other_user), post_ids[2:])
+        self.assertEqual(timeline.get_timeline(self.author), post_ids[::-1])
+
+    def test_failed_fan_out_rolls_back_post(self):
+        """
+        Ensure post isn't created when pushing it to timelines fails.
+        """
+        timeline.follow(self.user, self.author)
+        self.client.force_authenticate(self.author)
+        with mock.patch.object(timeline, 'fan_out', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                self.client.post(reverse('posts-list'), {'title': 'Title', 'content': 'Content'}, format='json')
+        self.assertFalse(Post.objects.exists())
+
+    def test_requires_authentication(self):
+        """
+        Ensure anonymous user can't read timeline or follow.
+        """
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('posts-timeline'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('users-follow', args=(self.author.id, )))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(APPROXIMATE_LIKES={'ENABLED': True, 'THRESHOLD': 1000, 'STEP': 100})
+class ApproximateLikesTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        cls.post = Post.objects.create(title='Viral', owner=cls.user, content='Content', likes_count=2000)
+        cls.other_post = Post.objects.create(title='Quiet', owner=cls.user, content='Content', likes_count=500)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_accuracy_bounds(self):
+        """
+        Ensure sampled count stays unbiased and within standard error bounds.
+        """
+        changes = 2000
+        standard_error = math.sqrt(changes * (100 - 1))
+        with mock.patch.object(approximate, '_random', random.Random(0)):
+            errors = [sum(approximate.sample_delta(1000, 1) for i in range(changes)) - changes for trial in range(100)]
+        self.assertTrue(all(abs(error) <= 4 * standard_error for error in errors))
+        self.assertGreaterEqual(sum(abs(error) <= 2 * standard_error for error in errors), 90)
+        self.assertLess(abs(sum(errors) / len(errors)), standard_error / 2)
+
+    def test_exact_below_threshold(self):
+        """
+        Ensure counts below threshold or with approximate mode disabled are changed exactly.
+        """
+        self.assertEqual(approximate.sample_delta(999, 1), 1)
+        self.assertEqual(approximate.sample_delta(999, -1), -1)
+        with override_settings(APPROXIMATE_LIKES={'ENABLED': False}):
+            self.assertEqual(approximate.sample_delta(10 ** 9, 1), 1)
+            self.assertFalse(approximate.is_approximate(10 ** 9))
+
+    def test_like_sampled_and_flagged(self):
+        """
+        Ensure likes above threshold change count by step when sampled and response flags count as approximate.
+        """
+        with mock.patch.object(approximate._random, 'random', return_value=0.5):
+            self.client.post(reverse('posts-like', args=(self.post.id, )))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes_count, 2000)
+        self.assertTrue(Like.objects.filter(object_id=self.post.id, user=self.user).exists())
+
+        with mock.patch.object(approximate._random, 'random', return_value=0.001):
+            self.client.post(reverse('posts-unlike', args=(self.post.id, )))
+        response = self.client.get(reverse('posts-detail', args=(self.post.id, )))
+        self.assertEqual(response.data['total_likes'], 1900)
+        self.assertTrue(response.data['is_total_likes_approximate'])
+
+        self.client.post(reverse('posts-like', args=(self.other_post.id, )))
+        response = self.client.get(reverse('posts-detail', args=(self.other_post.id, )))
+        self.assertEqual(response.data['total_likes'], 501)
+        self.assertFalse(response.data['is_total_likes_approximate'])
+
+    def test_bulk_and_buffered_likes_sampled(self):
+        """
+        Ensure bulk and buffered likes sample changes of counts above threshold too.
+        """
+        def get_counts():
+            return [Post.objects.get(pk=post.pk).likes_count for post in (self.post, self.other_post)]
+
+        with mock.patch.object(approximate._random, 'random', return_value=0.5):
+            utils.bulk_add_likes([self.post, self.other_post], self.user)
+        self.assertEqual(get_counts(), [2000, 501])
+
+        with mock.patch.object(approximate._random, 'random', return_value=0.001):
+            utils.bulk_remove_likes([self.post, self.other_post], self.user)
+        self.assertEqual(get_counts(), [1900, 500])
+
+        with mock.patch.object(approximate._random, 'random', return_value=0.001):
+            utils.write_like_intents({(Post, self.post.pk, self.user.pk): True})
+        self.assertEqual(get_counts(), [2000, 500])
+
+    def test_sparse_fields(self):
+        """
+        Ensure approximate flag alone doesn't defer like count.
+        """
+        url = reverse('posts-detail', args=(self.post.id, ))
+        with CaptureQueriesContext(connection) as expected:
+            self.client.get(url, {'fields': 'id,total_likes'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,is_total_likes_approximate'})
+        self.assertEqual(response.data, {'id': self.post.id, 'is_total_likes_approximate': True})
+        self.assertEqual(len(queries), len(expected))
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': ['replica']})
+class ReplicaDatabaseTest(APITransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpassword')
+        self.other_user = User.objects.create_user('otheruser', 'other@example.com', 'testpassword')
+        self.post = Post.objects.create(title='First post', owner=self.user, content='First ever created post!')
+        utils.add_like(self.post, self.other_user)
+
+    def get_post_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connections['default']) as default_queries:
+            with CaptureQueriesContext(connections['replica']) as replica_queries:
+                response = getattr(self.client, method)(url, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400)
+        return [
+            [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'blog_' in query['sql']]
+            for queries in (default_queries, replica_queries)
+        ]
+
+    def test_reads_run_on_replica_until_write(self):
+        """
+        Ensure reads run on replica, and on primary for a user who just wrote.
+        """
+        self.client.force_authenticate(self.user)
+        url = reverse('posts-detail', args=(self.post.pk, ))
+        default_queries, replica_queries = self.get_post_queries('get', url)
+        self.assertEqual(default_queries, [])
+        self.assertTrue(replica_queries)
+
+        self.client.post(reverse('posts-like', args=(self.post.pk, )))
+        default_queries, replica_queries = self.get_post_queries('get', url)
+        self.assertTrue(default_queries)
+        self.assertEqual(replica_queries, [])
+
+    def test_streamed_fans_read_from_replica(self):
+        """
+        Ensure streamed fans are read from replica after the view returned.
+        """
+        self.client.force_authenticate(self.user)
+        default_queries, replica_queries = self.get_post_queries(
+            'get', reverse('posts-fans', args=(self.post.pk, )), HTTP_ACCEPT='application/x-ndjson'
+        )
+        self.assertEqual(default_queries, [])
+        self.assertTrue([query for query in replica_queries if 'blog_like' in query])
+
+    def test_anonymous_cache_filled_from_primary(self):
+        """
+        Ensure anonymous responses stored in cache are read from primary.
+        """
+        default_queries, replica_queries = self.get_post_queries('get', reverse('posts-list'))
+        self.assertTrue(default_queries)
+        self.assertEqual(replica_queries, [])
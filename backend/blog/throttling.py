@@ -0,0 +1,98 @@
+import math
+import time
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    kind = None
+    cache_format = 'throttle:{scope}:{kind}:{ident}'
+    lock_timeout = 1
+
+    def __init__(self):
+        # Rate depends on the view's scope, so it is resolved in allow_request().
+        self.tokens = None
+        self.required = 1
+
+    @property
+    def cache(self):
+        return caches['throttle']
+
+    def get_scope(self, view):
+        action = getattr(view, 'action', None)
+        return getattr(view, 'throttle_scopes', {}).get(action, getattr(view, 'throttle_scope', None))
+
+    def get_rate(self):
+        return self.THROTTLE_RATES.get('{}_{}'.format(self.scope, self.kind))
+
+    def get_ident_key(self, ident):
+        return self.cache_format.format(scope=self.scope, kind=self.kind, ident=ident)
+
+    def get_cost(self, request, view):
+        # Bulk actions are charged per item, so a batch can't spend more than the same number of single requests.
+        is_bulk = getattr(view, 'action', None) in getattr(view, 'throttle_bulk_actions', ())
+        if is_bulk and isinstance(request.data, list):
+            return max(len(request.data), 1)
+        return 1
+
+    @contextmanager
+    def lock(self):
+        key = '{}:lock'.format(self.key)
+        deadline = time.monotonic() + self.lock_timeout
+        is_locked = self.cache.add(key, True, self.lock_timeout)
+        while not is_locked and time.monotonic() < deadline:
+            time.sleep(0.001)
+            is_locked = self.cache.add(key, True, self.lock_timeout)
+        try:
+            yield
+        finally:
+            if is_locked:
+                self.cache.delete(key)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        # A batch bigger than the bucket is let through once the bucket is full and leaves it in debt.
+        cost = self.get_cost(request, view)
+        with self.lock():
+            now = self.timer()
+            tokens, updated_at = self.cache.get(self.key, (self.num_requests, now))
+            self.tokens = min(self.num_requests, tokens + (now - updated_at) * self.num_requests / self.duration)
+            self.required = min(cost, self.num_requests)
+            if self.tokens < self.required:
+                return False
+            self.tokens -= cost
+            # The bucket is full again, same as missing, once the entry expires.
+            timeout = math.ceil((self.num_requests - self.tokens) * self.duration / self.num_requests)
+            self.cache.set(self.key, (self.tokens, now), timeout)
+        return True
+
+    def wait(self):
+        return (self.required - self.tokens) * self.duration / self.num_requests
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.get_ident_key(request.user.pk)
+        return self.get_ident_key(self.get_ident(request))
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident_key(self.get_ident(request))
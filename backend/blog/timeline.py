@@ -0,0 +1,106 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Follow, FollowerCount, Post, TimelineEntry
+
+DEFAULTS = {
+    'SIZE': 800,
+    'FANOUT_LIMIT': 1000,
+    'MAX_FANOUT_ROWS': 50000,
+    'BATCH_SIZE': 1000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'TIMELINE', {}).get(name, DEFAULTS[name])
+
+
+def is_pulled(user_id) -> bool:
+    # Posts of users with more followers than FANOUT_LIMIT are read from their posts instead of pushed.
+    return FollowerCount.objects.filter(user_id=user_id, count__gt=get_setting('FANOUT_LIMIT')).exists()
+
+
+def _change_follower_count(user_id, delta):
+    FollowerCount.objects.get_or_create(user_id=user_id)
+    FollowerCount.objects.filter(user_id=user_id).update(count=F('count') + delta)
+
+
+def _add_entries(user_ids, post_ids):
+    entries = (TimelineEntry(user_id=user_id, post_id=post_id) for user_id in user_ids for post_id in post_ids)
+    while True:
+        batch = list(islice(entries, get_setting('BATCH_SIZE')))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def follow(follower, followee) -> bool:
+    with transaction.atomic():
+        _, is_created = Follow.objects.get_or_create(follower=follower, followee=followee)
+        if is_created:
+            _change_follower_count(followee.pk, 1)
+            if not is_pulled(followee.pk):
+                posts = Post.objects.filter(owner=followee).order_by('-pk')[:get_setting('SIZE')]
+                _add_entries([follower.pk], list(posts.values_list('pk', flat=True)))
+    return is_created
+
+
+def unfollow(follower, followee) -> bool:
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower=follower, followee=followee).delete()
+        if deleted:
+            _change_follower_count(followee.pk, -1)
+            TimelineEntry.objects.filter(user=follower, post__owner=followee).delete()
+    return bool(deleted)
+
+
+def remove_user_follows(user):
+    followee_ids = Follow.objects.filter(follower=user).values('followee_id')
+    FollowerCount.objects.filter(user_id__in=followee_ids).update(count=F('count') - 1)
+
+
+def fan_out(owner_id, post_ids):
+    if not post_ids:
+        return
+    _add_entries([owner_id], post_ids)
+    if is_pulled(owner_id):
+        return
+    follower_ids = list(Follow.objects.filter(followee_id=owner_id).values_list('follower_id', flat=True))
+    if follower_ids:
+        # Bounds rows written by one request, so a bulk import reaches followers with its newest posts only.
+        limit = max(get_setting('MAX_FANOUT_ROWS') // len(follower_ids), 1)
+        _add_entries(follower_ids, sorted(post_ids, reverse=True)[:limit])
+
+
+def get_timeline(user, before=None, limit=20) -> list:
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(post_id__lt=before)
+    post_ids = list(entries.order_by('-post_id').values_list('post_id', flat=True)[:limit])
+
+    # Pull on read costs the Follow lookup on every read, plus a query over posts of pulled authors when there are any.
+    pulled = Follow.objects.filter(
+        follower=user, followee__follower_count__count__gt=get_setting('FANOUT_LIMIT')
+    ).values_list('followee_id', flat=True)
+    pulled = list(pulled)
+    if pulled:
+        posts = Post.objects.filter(owner_id__in=pulled)
+        if before is not None:
+            posts = posts.filter(pk__lt=before)
+        post_ids = sorted(set(post_ids).union(posts.order_by('-pk').values_list('pk', flat=True)[:limit]), reverse=True)
+    return post_ids[:limit]
+
+
+def trim_timelines() -> int:
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {table} WHERE id IN ('
+            'SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY post_id DESC) AS position '
+            'FROM {table}) AS ranked WHERE position > %s)'.format(table=table),
+            [get_setting('SIZE')]
+        )
+        return cursor.rowcount
@@ -0,0 +1,107 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework_tracking.base_mixins import BaseLoggingMixin
+from rest_framework_tracking.models import APIRequestLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'GET_SAMPLE_RATE': 1.0,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'REQUEST_LOG', {}).get(name, DEFAULTS[name])
+
+
+class LogBuffer:
+    def __init__(self, maxsize, batch_size, flush_interval):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def put(self, log):
+        try:
+            self.queue.put_nowait(log)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        self._start()
+
+    def flush(self):
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='request-log-buffer', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            close_old_connections()
+            self._write(batch)
+
+    def _take(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            APIRequestLog.objects.bulk_create(batch)
+        except Exception:
+            with self._lock:
+                self.dropped += len(batch)
+            logger.exception('Failed to write %d API request logs.', len(batch))
+
+
+log_buffer = LogBuffer(get_setting('QUEUE_SIZE'), get_setting('BATCH_SIZE'), get_setting('FLUSH_INTERVAL'))
+atexit.register(log_buffer.flush)
+
+
+class BufferedLoggingMixin(BaseLoggingMixin):
+    def should_log(self, request, response):
+        if request.method == 'GET' and random.random() >= get_setting('GET_SAMPLE_RATE'):
+            return False
+        return super().should_log(request, response)
+
+    def handle_log(self):
+        log = APIRequestLog(**self.log)
+        if get_setting('ASYNC'):
+            log_buffer.put(log)
+        else:
+            log.save()
@@ -0,0 +1,75 @@
+import datetime
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import utils
+from .models import Like, Post, TrendingLike, TrendingScore
+
+DEFAULTS = {
+    'HALF_LIFE': 6 * 60 * 60,
+    'MIN_SCORE': 0.01,
+    'SIZE': 50,
+    'COMMIT_MARGIN': 60,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'TRENDING', {}).get(name, DEFAULTS[name])
+
+
+def get_decay(seconds) -> float:
+    return math.exp(-math.log(2) * seconds / get_setting('HALF_LIFE'))
+
+
+def get_horizon(now):
+    # Likes older than this contribute less than MIN_SCORE.
+    return now - datetime.timedelta(seconds=get_setting('HALF_LIFE') * math.log2(1 / get_setting('MIN_SCORE')))
+
+
+def update_trending_scores(now=None, rebuild=False) -> int:
+    now = now or timezone.now()
+    margin = datetime.timedelta(seconds=get_setting('COMMIT_MARGIN'))
+    with transaction.atomic():
+        if rebuild:
+            TrendingScore.objects.all().delete()
+            TrendingLike.objects.all().delete()
+        scores = TrendingScore.objects.all()
+        computed_at = scores.aggregate(computed_at=Max('computed_at'))['computed_at'] or get_horizon(now)
+
+        scores.update(score=F('score') * get_decay((now - computed_at).total_seconds()), computed_at=now)
+        scores.filter(score__lt=get_setting('MIN_SCORE')).delete()
+
+        # A like committed after the previous run may be stamped before it, so the window reaches COMMIT_MARGIN back
+        # and skips likes counted by the previous run, which remembers likes that the next window overlaps.
+        likes = Like.objects.filter(
+            content_type_id=utils.get_content_type_id(Post), created_at__gt=computed_at - margin, created_at__lte=now
+        ).exclude(pk__in=TrendingLike.objects.values('like_id'))
+        added = Counter()
+        counted = []
+        for like_id, object_id, created_at in likes.values_list('id', 'object_id', 'created_at').iterator():
+            added[object_id] += get_decay((now - created_at).total_seconds())
+            if created_at > now - margin:
+                counted.append(TrendingLike(like_id=like_id, created_at=created_at))
+        TrendingLike.objects.filter(created_at__lte=now - margin).delete()
+        TrendingLike.objects.bulk_create(counted)
+
+        post_ids = set(Post.objects.filter(pk__in=list(added)).values_list('pk', flat=True))
+        existing = list(TrendingScore.objects.filter(post_id__in=post_ids))
+        for score in existing:
+            score.score += added[score.post_id]
+        TrendingScore.objects.bulk_update(existing, ['score'])
+        TrendingScore.objects.bulk_create(
+            TrendingScore(post_id=post_id, score=added[post_id], computed_at=now)
+            for post_id in post_ids - {score.post_id for score in existing}
+        )
+    return TrendingScore.objects.count()
+
+
+def get_trending(queryset):
+    trending = queryset.filter(trending_score__isnull=False).order_by('-trending_score__score', '-id')
+    return trending[:get_setting('SIZE')]
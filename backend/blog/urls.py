@@ -1,13 +1,19 @@
+from django.conf import settings
 from django.conf.urls import url
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
     TokenObtainPairView, TokenRefreshView,
 )
 
-from .views import AnalyticsAPIView, PostViewSet, UserCreateAPIView
+from .async_views import async_urlpatterns
+from .views import (
+    AnalyticsAPIView, MetricsAPIView, PostViewSet, UserCreateAPIView,
+    UserViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='posts')
+router.register(r'users', UserViewSet, basename='users')
 
 urlpatterns = router.urls
 
@@ -15,5 +21,9 @@ urlpatterns += [
     url(r'^users/register/', UserCreateAPIView.as_view(), name='users-create'),
     url(r'^token/obtain/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     url(r'^token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    url(r'^analytics/', AnalyticsAPIView.as_view(), name='analytics')
+    url(r'^analytics/', AnalyticsAPIView.as_view(), name='analytics'),
+    url(r'^metrics/', MetricsAPIView.as_view(), name='metrics'),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns(urlpatterns, {'posts-list', 'posts-detail', 'posts-fans', 'analytics'})
@@ -1,30 +1,300 @@
+import random
+from collections import Counter
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
 
-from .models import Like
+from . import approximate, caching, likebuffer
+from .likebuffer import like_buffer
+from .models import DailyLikeStat, Like
 
 User = get_user_model()
 
+_content_type_ids = {}
+
+
+def get_content_type_id(model) -> int:
+    try:
+        return _content_type_ids[model]
+    except KeyError:
+        content_type_id = _content_type_ids[model] = ContentType.objects.get_for_model(model).id
+        return content_type_id
+
+
+def clear_content_type_cache(**kwargs):
+    _content_type_ids.clear()
+
+
+def _change_likes_count(obj, delta):
+    delta = approximate.sample_delta(obj.likes_count, delta)
+    if delta:
+        type(obj).objects.filter(pk=obj.pk).update(likes_count=F('likes_count') + delta)
+
+
+def _change_likes_counts(model, deltas):
+    if approximate.get_setting('ENABLED'):
+        counts = dict(model.objects.filter(pk__in=list(deltas)).values_list('pk', 'likes_count'))
+        deltas = {pk: approximate.sample_delta(counts.get(pk, 0), delta) for pk, delta in deltas.items()}
+    object_ids = {}
+    for object_id, delta in deltas.items():
+        if delta:
+            object_ids.setdefault(delta, []).append(object_id)
+    for delta, ids in object_ids.items():
+        model.objects.filter(pk__in=ids).update(likes_count=F('likes_count') + delta)
+
+
+def _change_daily_likes(likes_by_date, sign):
+    # Every like of the day would wait on a single row, so it's split into shards summed on read.
+    shard = random.randrange(getattr(settings, 'DAILY_LIKE_STAT_SHARDS', 1))
+    for date, total in likes_by_date.items():
+        stats = DailyLikeStat.objects.filter(date=date, shard=shard)
+        if not stats.update(total_likes=F('total_likes') + sign * total):
+            DailyLikeStat.objects.get_or_create(date=date, shard=shard)
+            stats.update(total_likes=F('total_likes') + sign * total)
+
+
+def _insert_like(content_type_id, object_id, user, created_at) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} (user_id, content_type_id, object_id, created_at) VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT DO NOTHING'.format(connection.ops.quote_name(Like._meta.db_table)),
+            [user.pk, content_type_id, object_id, connection.ops.adapt_datetimefield_value(created_at)]
+        )
+        return cursor.rowcount == 1
+
+
+def _insert_likes(likes) -> set:
+    # Only rows actually inserted are returned, so likes created concurrently aren't counted twice.
+    if not likes:
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} (user_id, content_type_id, object_id, created_at) VALUES {} '
+            'ON CONFLICT DO NOTHING RETURNING content_type_id, object_id, user_id'.format(
+                connection.ops.quote_name(Like._meta.db_table), ', '.join(['(%s, %s, %s, %s)'] * len(likes))
+            ),
+            [
+                param
+                for content_type_id, object_id, user_id, created_at in likes
+                for param in (user_id, content_type_id, object_id, connection.ops.adapt_datetimefield_value(created_at))
+            ]
+        )
+        return set(cursor.fetchall())
+
+
+def _buffer_like(obj, user, liked) -> bool:
+    is_changed = like_buffer.record((type(obj), obj.id, user.pk), liked, lambda: _like_exists(obj, user))
+    if is_changed:
+        caching.invalidate_post(obj.pk)
+    return is_changed
+
+
+def add_like(obj, user) -> bool:
+    if likebuffer.get_setting('ENABLED'):
+        return _buffer_like(obj, user, True)
+    created_at = timezone.now()
+    with transaction.atomic():
+        is_created = _insert_like(get_content_type_id(type(obj)), obj.id, user, created_at)
+        if is_created:
+            _change_likes_count(obj, 1)
+            _change_daily_likes({timezone.localdate(created_at): 1}, 1)
+    if is_created:
+        caching.invalidate_post(obj.pk)
+    return is_created
+
+
+def remove_like(obj, user) -> bool:
+    if likebuffer.get_setting('ENABLED'):
+        return _buffer_like(obj, user, False)
+    with transaction.atomic():
+        likes = Like.objects.filter(content_type_id=get_content_type_id(type(obj)), object_id=obj.id, user=user)
+        likes_by_date = Counter(timezone.localdate(date) for date in likes.values_list('created_at', flat=True))
+        deleted, _ = likes.delete()
+        if deleted:
+            _change_likes_count(obj, -deleted)
+            _change_daily_likes(likes_by_date, -1)
+    if deleted:
+        caching.invalidate_post(obj.pk)
+    return bool(deleted)
+
+
+def bulk_add_likes(objs, user) -> set:
+    if not objs:
+        return set()
+    like_buffer.flush()
+    model = type(objs[0])
+    content_type_id = get_content_type_id(model)
+    created_at = timezone.now()
+    with transaction.atomic():
+        created = _insert_likes([(content_type_id, obj.id, user.pk, created_at) for obj in objs])
+        created_ids = {object_id for _, object_id, _ in created}
+        if created_ids:
+            _change_likes_counts(model, dict.fromkeys(created_ids, 1))
+            _change_daily_likes({timezone.localdate(): len(created_ids)}, 1)
+    for object_id in created_ids:
+        caching.invalidate_post(object_id)
+    return created_ids
 
-def add_like(obj, user):
-    obj_type = ContentType.objects.get_for_model(obj)
-    like, is_created = Like.objects.get_or_create(content_type=obj_type, object_id=obj.id, user=user)
-    return like
 
+def bulk_remove_likes(objs, user) -> set:
+    if not objs:
+        return set()
+    like_buffer.flush()
+    model = type(objs[0])
+    with transaction.atomic():
+        likes = Like.objects.filter(
+            content_type_id=get_content_type_id(model), object_id__in=[obj.id for obj in objs], user=user
+        )
+        removed = list(likes.select_for_update().values_list('object_id', 'created_at'))
+        likes.delete()
+        removed_ids = {object_id for object_id, created_at in removed}
+        if removed_ids:
+            _change_likes_counts(model, dict.fromkeys(removed_ids, -1))
+            _change_daily_likes(Counter(timezone.localdate(created_at) for object_id, created_at in removed), -1)
+    for object_id in removed_ids:
+        caching.invalidate_post(object_id)
+    return removed_ids
 
-def remove_like(obj, user):
-    obj_type = ContentType.objects.get_for_model(obj)
-    Like.objects.filter(content_type=obj_type, object_id=obj.id, user=user).delete()
+
+def remove_all_likes(obj):
+    like_buffer.discard(type(obj), obj.id)
+    with transaction.atomic():
+        likes = Like.objects.filter(content_type_id=get_content_type_id(type(obj)), object_id=obj.id)
+        likes_by_date = dict(
+            likes.annotate(date=TruncDate('created_at')).order_by().values_list('date').annotate(Count('id'))
+        )
+        likes.delete()
+        _change_daily_likes(likes_by_date, -1)
+
+
+def remove_user_likes(user):
+    with transaction.atomic():
+        likes = Like.objects.filter(user=user)
+        removed = list(likes.select_for_update().values_list('content_type_id', 'object_id', 'created_at'))
+        likes.delete()
+        deltas = {}
+        for content_type_id, object_id, created_at in removed:
+            deltas.setdefault(content_type_id, {})[object_id] = -1
+        for content_type_id, object_deltas in deltas.items():
+            _change_likes_counts(ContentType.objects.get_for_id(content_type_id).model_class(), object_deltas)
+        _change_daily_likes(Counter(timezone.localdate(created_at) for _, _, created_at in removed), -1)
+    for content_type_id, object_id, created_at in removed:
+        caching.invalidate_post(object_id)
+
+
+def write_like_intents(intents):
+    models = {}
+    to_add, to_remove = set(), set()
+    for (model, object_id, user_id), liked in intents.items():
+        content_type_id = models.setdefault(model, get_content_type_id(model))
+        (to_add if liked else to_remove).add((content_type_id, object_id, user_id))
+    models = {content_type_id: model for model, content_type_id in models.items()}
+    created_at = timezone.now()
+
+    with transaction.atomic():
+        # Other processes may flush the same like, so only rows this transaction inserted or deleted are counted.
+        removed = {}
+        if to_remove:
+            likes = Like.objects.filter(Q(*[
+                Q(content_type_id=content_type_id, object_id=object_id, user_id=user_id)
+                for content_type_id, object_id, user_id in to_remove
+            ], _connector=Q.OR)).select_for_update()
+            removed = {
+                (content_type_id, object_id, user_id): (like_id, date)
+                for like_id, content_type_id, object_id, user_id, date in likes.values_list(
+                    'id', 'content_type_id', 'object_id', 'user_id', 'created_at'
+                )
+            }
+            Like.objects.filter(id__in=[like_id for like_id, date in removed.values()]).delete()
+        created = _insert_likes([key + (created_at, ) for key in to_add])
+
+        deltas = Counter(key[:2] for key in created)
+        deltas.subtract(key[:2] for key in removed)
+        object_deltas = {}
+        for (content_type_id, object_id), delta in deltas.items():
+            object_deltas.setdefault(content_type_id, {})[object_id] = delta
+        for content_type_id, changes in object_deltas.items():
+            _change_likes_counts(models[content_type_id], changes)
+        if created:
+            _change_daily_likes({timezone.localdate(created_at): len(created)}, 1)
+        _change_daily_likes(Counter(timezone.localdate(date) for like_id, date in removed.values()), -1)
+
+    for content_type_id, object_id in deltas:
+        caching.invalidate_post(object_id)
+
+
+def _like_exists(obj, user) -> bool:
+    likes = Like.objects.filter(content_type_id=get_content_type_id(type(obj)), object_id=obj.id, user=user)
+    return likes.exists()
 
 
 def is_fan(obj, user) -> bool:
     if not user.is_authenticated:
         return False
-    obj_type = ContentType.objects.get_for_model(obj)
-    likes = Like.objects.filter(content_type=obj_type, object_id=obj.id, user=user)
-    return likes.exists()
+    is_liked = like_buffer.get((type(obj), obj.id, user.pk))
+    if is_liked is not None:
+        return is_liked
+    return _like_exists(obj, user)
+
+
+def get_liked_ids(objs, user) -> set:
+    if not user.is_authenticated or not objs:
+        return set()
+    likes = Like.objects.filter(
+        content_type_id=get_content_type_id(type(objs[0])), object_id__in=[obj.id for obj in objs], user=user
+    )
+    liked_ids = set(likes.values_list('object_id', flat=True))
+    for object_id, is_liked in like_buffer.get_many(type(objs[0]), [obj.id for obj in objs], user.pk).items():
+        if is_liked:
+            liked_ids.add(object_id)
+        else:
+            liked_ids.discard(object_id)
+    return liked_ids
+
+
+def prefetch_pending_likes(objs):
+    if not objs:
+        return
+    deltas = like_buffer.get_deltas(type(objs[0]), [obj.id for obj in objs])
+    for obj in objs:
+        obj.pending_likes = deltas.get(obj.id, 0)
 
 
 def get_fans(obj):
-    obj_type = ContentType.objects.get_for_model(obj)
-    return User.objects.filter(likes__content_type=obj_type, likes__object_id=obj.id)
+    return User.objects.filter(
+        likes__content_type_id=get_content_type_id(type(obj)), likes__object_id=obj.id
+    ).annotate(liked_at=F('likes__created_at'))
+
+
+def sync_likes_count(queryset) -> int:
+    likes = Like.objects.filter(
+        content_type_id=get_content_type_id(queryset.model), object_id=OuterRef('pk')
+    ).order_by().values('object_id').annotate(total=Count('id')).values('total')
+    actual_count = Coalesce(Subquery(likes, output_field=IntegerField()), 0)
+
+    drifted = queryset.annotate(actual_count=actual_count).exclude(likes_count=F('actual_count'))
+    with transaction.atomic():
+        return queryset.model.objects.filter(
+            pk__in=list(drifted.values_list('pk', flat=True))
+        ).update(likes_count=actual_count)
+
+
+def get_daily_likes(stats=None) -> list:
+    stats = DailyLikeStat.objects.all() if stats is None else stats
+    days = stats.order_by('date').values('date').annotate(total=Sum('total_likes'))
+    return [{'date': day['date'], 'total_likes': day['total']} for day in days]
+
+
+def rebuild_daily_like_stats(likes=None, stats=None) -> int:
+    likes = Like.objects.all() if likes is None else likes
+    stats = DailyLikeStat.objects.all() if stats is None else stats
+    days = likes.annotate(date=TruncDate('created_at')).order_by().values('date').annotate(total_likes=Count('id'))
+    with transaction.atomic():
+        stats.delete()
+        stats = DailyLikeStat.objects.bulk_create(DailyLikeStat(**day) for day in days)
+    return len(stats)
@@ -1,31 +1,117 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db import transaction
 from rest_framework import generics, status, viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import action
+from rest_framework.permissions import (
+    AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
-from rest_framework_tracking.mixins import LoggingMixin
 
-from .mixins import LikedMixin
-from .models import Like, Post
-from .serializers import PostSerializer, UserSerializer
+from . import caching, metrics, search, timeline, trending, utils
+from .filters import DailyLikeStatFilter, PostFilter
+from .mixins import (
+    AnonymousCacheMixin, LikedMixin, ReplicaRoutingMixin, get_bulk_items,
+)
+from .models import DailyLikeStat, Post
+from .pagination import PostCursorPagination
+from .permissions import IsLocalRequest
+from .serializers import (
+    PostSerializer, TimelineQuerySerializer, UserSerializer,
+    get_requested_fields,
+)
+from .tracking import BufferedLoggingMixin
 
 User = get_user_model()
 
+# Columns read only to render a serializer field, deferred when the field isn't requested.
+SPARSE_FIELD_COLUMNS = {
+    'content': 'content',
+    'total_likes': 'likes_count',
+    'is_total_likes_approximate': 'likes_count',
+}
 
-class PostViewSet(LoggingMixin, LikedMixin, viewsets.ModelViewSet):
-    queryset = Post.objects.all()
+
+class PostViewSet(BufferedLoggingMixin, ReplicaRoutingMixin, AnonymousCacheMixin, LikedMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.select_related('owner').defer('search_vector')
     serializer_class = PostSerializer
+    filterset_class = PostFilter
     permission_classes = (IsAuthenticatedOrReadOnly, )
+    throttle_scopes = {**LikedMixin.throttle_scopes, 'create': 'posts', 'bulk': 'posts'}
+    throttle_bulk_actions = ('bulk', 'bulk_likes')
+
+    @property
+    def paginator(self):
+        if self.action == 'list' and self.request.query_params.get('pagination') == 'cursor':
+            self.pagination_class = PostCursorPagination
+        return super().paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = get_requested_fields(self.request)
+        if fields is None:
+            return queryset
+        if 'owner' not in fields:
+            queryset = queryset.select_related(None)
+        columns = {column for field, column in SPARSE_FIELD_COLUMNS.items() if field in fields}
+        return queryset.defer(*set(SPARSE_FIELD_COLUMNS.values()) - columns)
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(owner=self.request.user)
+            timeline.fan_out(post.owner_id, [post.pk])
+
+    @action(detail=False, methods=['GET'])
+    def trending(self, request):
+        serializer = self.get_serializer(trending.get_trending(self.get_queryset()), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['GET'], permission_classes=(IsAuthenticated, ))
+    def timeline(self, request):
+        query = TimelineQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        limit = query.validated_data.get('limit', api_settings.PAGE_SIZE)
+        post_ids = timeline.get_timeline(request.user, query.validated_data.get('before'), limit)
 
+        posts = self.get_queryset().in_bulk(post_ids)
+        serializer = self.get_serializer([posts[pk] for pk in post_ids if pk in posts], many=True)
+        next_url = None
+        if len(post_ids) == limit:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', post_ids[-1])
+        return Response({'next': next_url, 'results': serializer.data})
 
-class UserCreateAPIView(LoggingMixin, generics.CreateAPIView):
+    @action(detail=False, methods=['POST'], permission_classes=(IsAuthenticated, ))
+    def bulk(self, request):
+        results = []
+        posts = []
+        for item in get_bulk_items(request):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                post = Post(owner=request.user, **serializer.validated_data)
+                posts.append(post)
+                results.append(post)
+            else:
+                results.append({'status': 'invalid', 'errors': serializer.errors})
+
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            post_ids = [post.pk for post in posts]
+            search.update_search_vector(Post.objects.filter(pk__in=post_ids))
+            timeline.fan_out(request.user.pk, post_ids)
+        caching.invalidate_list()
+        return Response({
+            'results': [{'status': 'created', 'id': result.id} if isinstance(result, Post) else result
+                        for result in results]
+        })
+
+
+class UserCreateAPIView(BufferedLoggingMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AllowAny, )
+    throttle_scope = 'register'
 
     def post(self, request, *args, **kwargs):
         serializer = UserSerializer(data=request.data)
@@ -37,10 +123,42 @@ class UserCreateAPIView(LoggingMixin, generics.CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AnalyticsAPIView(LoggingMixin, APIView):
+class UserViewSet(BufferedLoggingMixin, ReplicaRoutingMixin, viewsets.GenericViewSet):
+    queryset = User.objects.all()
+    permission_classes = (IsAuthenticated, )
+
+    @action(detail=True, methods=['POST'])
+    def follow(self, request, pk=None):
+        user = self.get_object()
+        if user == request.user:
+            return Response({'detail': 'You can not follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
+        timeline.follow(request.user, user)
+        return Response()
+
+    @action(detail=True, methods=['POST'])
+    def unfollow(self, request, pk=None):
+        timeline.unfollow(request.user, self.get_object())
+        return Response()
+
+
+class AnalyticsAPIView(BufferedLoggingMixin, ReplicaRoutingMixin, APIView):
+    read_database_setting = 'ANALYTICS'
+
     def get(self, request):
-        data = Like.objects.extra({'date': 'date(created_at)'}).values('date').annotate(total_likes=Count('id'))
+        stats = DailyLikeStatFilter(request.query_params, queryset=DailyLikeStat.objects.all())
+        if not stats.is_valid():
+            return Response(stats.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [day for day in utils.get_daily_likes(stats.qs) if day['total_likes'] > 0]
         if not data:
             return Response({'status': 'There is no data available for know.'}, status=status.HTTP_204_NO_CONTENT)
         else:
             return Response(data, status=status.HTTP_200_OK)
+
+
+class MetricsAPIView(APIView):
+    authentication_classes = ()
+    permission_classes = (IsLocalRequest, )
+
+    def get(self, request):
+        return Response(metrics.endpoint_metrics.snapshot(), status=status.HTTP_200_OK)
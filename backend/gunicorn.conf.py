@@ -0,0 +1,13 @@
+import multiprocessing
+import os
+
+# SERVER_MODE=asgi runs uvicorn workers for backend.asgi:application, otherwise threaded workers for backend.wsgi.
+bind = os.environ.get('SERVER_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('SERVER_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('SERVER_THREADS', 4))
+worker_class = 'uvicorn.workers.UvicornH11Worker' if os.environ.get('SERVER_MODE') == 'asgi' else 'gthread'
+timeout = 30
+keepalive = 5
+max_requests = 10000
+max_requests_jitter = 1000
+accesslog = '-'
@@ -1,8 +1,12 @@
 import configparser
 import datetime
 import json
+import math
+import threading
 import time
-from random import randrange
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from random import choice, choices, randrange
 
 import click
 import requests
@@ -10,9 +14,86 @@ from faker import Faker
 
 API_URL = 'http://0.0.0.0:8000/api/v1/'
 API_POSTS = API_URL + 'posts/'
+API_POSTS_BULK = API_POSTS + 'bulk/'
+API_LIKES_BULK = API_POSTS + 'likes/bulk/'
+BULK_BATCH_SIZE = 500
+THROTTLE_RETRIES = 5
+THROTTLE_MAX_WAIT = 60
 USER_SIGNUP_URL = API_URL + 'users/register/'
 TOKEN_OBTAIN_URL = API_URL + 'token/obtain/'
 TOKEN_REFRESH_URL = API_URL + 'token/refresh/'
+ANALYTICS_URL = API_URL + 'analytics/'
+
+LOADTEST_ENDPOINTS = {
+    'list': ('GET', lambda post_id: API_POSTS),
+    'detail': ('GET', lambda post_id: API_POSTS + '{}/'.format(post_id)),
+    'fans': ('GET', lambda post_id: API_POSTS + '{}/fans/'.format(post_id)),
+    'analytics': ('GET', lambda post_id: ANALYTICS_URL),
+    'create': ('POST', lambda post_id: API_POSTS),
+    'like': ('POST', lambda post_id: API_POSTS + '{}/like/'.format(post_id)),
+    'unlike': ('POST', lambda post_id: API_POSTS + '{}/unlike/'.format(post_id)),
+}
+LOADTEST_POST_ENDPOINTS = {'detail', 'fans', 'like', 'unlike'}
+LOADTEST_DEFAULT_MIX = 'list=40,detail=25,fans=10,analytics=5,create=5,like=10,unlike=5'
+LOADTEST_POST_SAMPLE = 1000
+LOADTEST_TIMEOUT = 30
+LOADTEST_ERRORS = ('client_error', 'server_error', 'timeout', 'connection_error')
+
+thread_data = threading.local()
+requests_counter = {'count': 0, 'lock': threading.Lock()}
+
+
+def get_session():
+    """Return keep-alive HTTP session bound to current thread."""
+
+    if not hasattr(thread_data, 'session'):
+        thread_data.session = requests.Session()
+    return thread_data.session
+
+
+def api_post(url, **kwargs):
+    """Send POST request through pooled session of current thread, waiting out throttled (429) responses."""
+
+    for attempt in range(THROTTLE_RETRIES + 1):
+        with requests_counter['lock']:
+            requests_counter['count'] += 1
+        response = get_session().post(url, **kwargs)
+        if response.status_code != 429 or attempt == THROTTLE_RETRIES:
+            return response
+        wait = float(response.headers.get('Retry-After', 2 ** attempt))
+        time.sleep(min(wait, THROTTLE_MAX_WAIT))
+
+
+def run_phase(label, items, worker, concurrency):
+    """Run worker for every item on a thread pool, show progress bar and report throughput."""
+
+    results = [None] * len(items)
+
+    with requests_counter['lock']:
+        requests_counter['count'] = 0
+    t_start = time.perf_counter()
+
+    with click.progressbar(
+            length=len(items),
+            label=label,
+            show_eta=True,
+            fill_char=click.style('#', fg='green'),
+            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
+    ) as bar:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(worker, item): index for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                bar.update(1)
+
+    elapsed = time.perf_counter() - t_start
+    click.echo('\r[{}] {}'.format(click.style('✓', fg='green'), label))
+    click.echo(
+        ' └─[' + click.style('❢', fg='blue') + '] ' + click.style(str(requests_counter['count']), fg='green')
+        + ' requests in {:.2f}s ({:.1f} req/s)'.format(elapsed, requests_counter['count'] / elapsed if elapsed else 0)
+    )
+
+    return results
 
 
 def api_refresh_token(refresh_token):
@@ -22,7 +103,7 @@ def api_refresh_token(refresh_token):
         'refresh': refresh_token,
     }
 
-    response = requests.post(TOKEN_REFRESH_URL, json=payload)
+    response = api_post(TOKEN_REFRESH_URL, json=payload)
 
     response_json = json.loads(response.text)
     new_access_token = response_json['access']
@@ -30,44 +111,61 @@ def api_refresh_token(refresh_token):
     return new_access_token
 
 
-def signup_users(users_count, storage_path):
+def api_bulk_post(url, items, user_data):
+    """Send items to bulk endpoint in batches and return per-item results."""
+
+    results = []
+    header = {
+        'Authorization': 'JWT {}'.format(user_data['access_token'])
+    }
+    for start in range(0, len(items), BULK_BATCH_SIZE):
+        batch = items[start:start + BULK_BATCH_SIZE]
+        response = api_post(url, headers=header, json=batch)
+
+        if response.status_code == 401:
+            header = {
+                'Authorization': 'JWT {}'.format(api_refresh_token(user_data['refresh_token']))
+            }
+            response = api_post(url, headers=header, json=batch)
+
+        if response.status_code == 200:
+            results.extend(json.loads(response.text)['results'])
+    return results
+
+
+def signup_users(users_count, storage_path, concurrency=1):
     """Generate and sign up all fake users."""
 
     fake = Faker()
     data = {}
-    total_users = 0
 
-    with click.progressbar(
-            range(users_count),
-            label='Generating and signing up users',
-            show_eta=True,
-            fill_char=click.style('#', fg='green'),
-            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
-    ) as bar:
-        for user in bar:
-            fake_username = fake.profile(fields=['username'])['username']
-            fake_email = fake.profile(fields=['mail'])['mail']
-            fake_password = fake.password(length=12, special_chars=False, upper_case=False)
-
-            payload = {
-                'username': fake_username,
-                'email': fake_email,
-                'password': fake_password,
+    payloads = [
+        {
+            'username': fake.profile(fields=['username'])['username'],
+            'email': fake.profile(fields=['mail'])['mail'],
+            'password': fake.password(length=12, special_chars=False, upper_case=False),
+        }
+        for user in range(users_count)
+    ]
+
+    def signup(payload):
+        response = api_post(USER_SIGNUP_URL, json=payload)
+        return response.status_code == 201
+
+    results = run_phase('Generating and signing up users', payloads, signup, concurrency)
+
+    for user, (payload, is_created) in enumerate(zip(payloads, results)):
+        if is_created:
+            data[user] = {
+                'id': user,
+                'username': payload['username'],
+                'password': payload['password'],
+                'email': payload['email'],
+                'access_token': '',
+                'refresh_token': ''
             }
 
-            response = requests.post(USER_SIGNUP_URL, json=payload)
-
-            if response.status_code == 201:
-                data[user] = {
-                    'id': user,
-                    'username': fake_username,
-                    'password': fake_password,
-                    'email': fake_email,
-                    'access_token': '',
-                    'refresh_token': ''
-                }
-
-                total_users += 1
+    total_users = len(data)
 
     with open(storage_path, 'w') as storage:
         json.dump(data, storage, indent=4)
@@ -77,80 +175,79 @@ def signup_users(users_count, storage_path):
         + ' fake users created in ' + click.style(storage_path, fg='green')
     )
 
-    click.echo('\r[{}] Generating and signing up users'.format(click.style('✓', fg='green')))
-
 
-def update_users(storage_path):
+def update_users(storage_path, concurrency=1):
     """Update access and refresh tokens for fake users in JSON."""
 
     with open(storage_path, 'r') as database:
         data = json.load(database)
 
-    with click.progressbar(
-            data,
-            label='Retrieving tokens',
-            show_eta=True,
-            fill_char=click.style('#', fg='green'),
-            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
-    ) as bar:
-        for user in bar:
-            payload = {
-                'username': data[user]['username'],
-                'password': data[user]['password'],
-            }
-            response = requests.post(TOKEN_OBTAIN_URL, json=payload)
-            response_json = json.loads(response.text)
-            data[user]['access_token'] = response_json['access']
-            data[user]['refresh_token'] = response_json['refresh']
+    def obtain_tokens(user):
+        payload = {
+            'username': data[user]['username'],
+            'password': data[user]['password'],
+        }
+        response = api_post(TOKEN_OBTAIN_URL, json=payload)
+        return json.loads(response.text)
+
+    users = list(data)
+    results = run_phase('Retrieving tokens', users, obtain_tokens, concurrency)
+
+    for user, response_json in zip(users, results):
+        data[user]['access_token'] = response_json['access']
+        data[user]['refresh_token'] = response_json['refresh']
 
     with open(storage_path, 'w') as output:
         json.dump(data, output, indent=4)
 
-    click.echo('\r[{}] Retrieving tokens'.format(click.style('✓', fg='green')))
-
 
-def create_posts(storage_path, max_posts):
+def create_posts(storage_path, max_posts, concurrency=1, bulk=False):
     """Create randrange(0, max_posts) posts by user."""
 
     fake = Faker()
-    total_posts = 0
 
     with open(storage_path, 'r') as database:
         data = json.load(database)
 
-    with click.progressbar(
-            data,
-            label='Creating posts',
-            show_eta=True,
-            fill_char=click.style('#', fg='green'),
-            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
-    ) as bar:
-        for user in bar:
-            posts_count = randrange(0, max_posts)
-            for post in range(0, posts_count):
-                header = {
-                    'Authorization': 'JWT {}'.format(data[user]['access_token'])
-                }
-                payload = {
+    users_posts = [
+        (
+            user,
+            [
+                {
                     'title': fake.sentence(nb_words=6, variable_nb_words=True),
                     'content': fake.text(max_nb_chars=350),
                 }
+                for post in range(0, randrange(0, max_posts))
+            ]
+        )
+        for user in data
+    ]
+
+    def create_user_posts(user_posts):
+        user, payloads = user_posts
+        if bulk:
+            results = api_bulk_post(API_POSTS_BULK, payloads, data[user])
+            return sum(1 for result in results if result['status'] == 'created')
+
+        created = 0
+        header = {
+            'Authorization': 'JWT {}'.format(data[user]['access_token'])
+        }
+        for payload in payloads:
+            response = api_post(API_POSTS, headers=header, json=payload)
+
+            if response.status_code == 401:
+                header = {
+                    'Authorization': 'JWT {}'.format(api_refresh_token(data[user]['refresh_token']))
+                }
+                response = api_post(API_POSTS, headers=header, json=payload)
+
+            if response.status_code == 201:
+                created += 1
+        return created
+
+    total_posts = sum(run_phase('Creating posts', users_posts, create_user_posts, concurrency))
 
-                response = requests.post(API_POSTS, headers=header, json=payload)
-
-                if response.status_code == 401:
-                    header = {
-                        'Authorization': 'JWT {}'.format(api_refresh_token(data[user]['refresh_token']))
-                    }
-                    payload = {
-                        'title': fake.sentence(nb_words=6, variable_nb_words=True),
-                        'content': fake.text(max_nb_chars=350),
-                    }
-                    response = requests.post(API_POSTS, headers=header, json=payload)
-                elif response.status_code == 201:
-                    total_posts += 1
-
-    click.echo('\r[{}] Creating posts'.format(click.style('✓', fg='green')))
     click.echo(
         ' └─[' + click.style('❢', fg='blue') + '] ' + click.style(str(total_posts), fg='green')
         + ' posts was created by fake users.'
@@ -159,48 +256,161 @@ def create_posts(storage_path, max_posts):
     return total_posts
 
 
-def like_posts(storage_path, max_likes, total_posts):
+def like_posts(storage_path, max_likes, total_posts, concurrency=1, bulk=False):
     """Like randrange(0, max_likes) posts per user."""
 
-    total_likes = 0
-
     with open(storage_path, 'r') as database:
         data = json.load(database)
 
-    with click.progressbar(
-            data,
-            label='Like posts',
-            show_eta=True,
-            fill_char=click.style('#', fg='green'),
-            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
-    ) as bar:
-        for user in bar:
-            liked_posts = randrange(0, max_likes)
-            for post in range(0, liked_posts):
-                post_id = randrange(0, total_posts)
-                header = {
-                    'Authorization': 'JWT {}'.format(data[user]['access_token'])
-                }
+    users_likes = [
+        (user, [randrange(0, total_posts) for post in range(0, randrange(0, max_likes))])
+        for user in data
+    ]
+
+    def like_user_posts(user_likes):
+        user, post_ids = user_likes
+        if bulk:
+            items = [{'id': post_id, 'action': 'like'} for post_id in sorted(set(post_ids))]
+            results = api_bulk_post(API_LIKES_BULK, items, data[user])
+            return sum(1 for result in results if result['status'] == 'liked')
 
-                url = API_POSTS + '{}/like/'.format(post_id)
-                response = requests.post(url, headers=header)
+        liked = 0
+        header = {
+            'Authorization': 'JWT {}'.format(data[user]['access_token'])
+        }
+        for post_id in post_ids:
+            url = API_POSTS + '{}/like/'.format(post_id)
+            response = api_post(url, headers=header)
 
-                if response.status_code == 200:
-                    total_likes += 1
+            if response.status_code == 200:
+                liked += 1
+        return liked
+
+    total_likes = sum(run_phase('Like posts', users_likes, like_user_posts, concurrency))
 
-    click.echo('\r[{}] Like posts'.format(click.style('✓', fg='green')))
     click.echo(
         ' └─[' + click.style('❢', fg='blue') + '] ' + click.style(str(total_likes), fg='green')
         + ' likes was created by fake users.'
     )
 
 
-@click.command()
-def cli():
+def parse_mix(mix):
+    """Parse `endpoint=weight` pairs of load test mix."""
+
+    weights = {}
+    for pair in mix.split(','):
+        endpoint, _, weight = pair.partition('=')
+        endpoint = endpoint.strip()
+        if endpoint not in LOADTEST_ENDPOINTS:
+            raise click.BadParameter('unknown endpoint `{}`'.format(endpoint), param_hint='--mix')
+        try:
+            weights[endpoint] = float(weight)
+        except ValueError:
+            raise click.BadParameter('weight of `{}` is not a number'.format(endpoint), param_hint='--mix')
+    return weights
+
+
+def percentile(values, percent):
+    """Return nearest-rank percentile of sorted values."""
+
+    if not values:
+        return None
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def count_errors(outcomes):
+    """Count failed requests, leaving out 404 of posts deleted during the run."""
+
+    return sum(outcomes[outcome] for outcome in LOADTEST_ERRORS)
+
+
+def summarize_latencies(samples, elapsed):
+    """Aggregate (endpoint, latency_ms, outcome) samples per endpoint."""
+
+    endpoints = {}
+    for endpoint in sorted({sample[0] for sample in samples}):
+        latencies = sorted(latency for name, latency, outcome in samples if name == endpoint)
+        outcomes = Counter(outcome for name, latency, outcome in samples if name == endpoint)
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': count_errors(outcomes),
+            'error_rate': count_errors(outcomes) / len(latencies),
+            'not_found': outcomes['not_found'],
+            'client_errors': outcomes['client_error'],
+            'server_errors': outcomes['server_error'],
+            'timeouts': outcomes['timeout'],
+            'connection_errors': outcomes['connection_error'],
+            'throughput': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+    return endpoints
+
+
+def sample_post_ids(limit=LOADTEST_POST_SAMPLE):
+    """Collect ids of up to `limit` latest posts, so post requests go to posts that exist."""
+
+    post_ids = []
+    url, params = API_POSTS, {'pagination': 'cursor', 'limit': 100, 'fields': 'id'}
+    while url and len(post_ids) < limit:
+        page = json.loads(get_session().get(url, params=params).text)
+        post_ids.extend(post['id'] for post in page['results'])
+        url, params = page['next'], None
+    return post_ids[:limit]
+
+
+def get_outcome(status_code):
+    """Classify response status of load test request."""
+
+    if status_code < 400:
+        return 'ok'
+    if status_code == 404:
+        return 'not_found'
+    if status_code >= 500:
+        return 'server_error'
+    return 'client_error'
+
+
+def loadtest_request(endpoint, post_ids, users, scheduled_at):
+    """Send single load test request and return (endpoint, latency_ms, outcome), latency counted from `scheduled_at`."""
+
+    method, url = LOADTEST_ENDPOINTS[endpoint]
+    kwargs = {}
+    if method == 'POST':
+        user = choice(users)
+        kwargs['headers'] = {'Authorization': 'JWT {}'.format(user['access_token'])}
+    if endpoint == 'create':
+        kwargs['json'] = {'title': 'Load test post', 'content': 'Created by automation bot load test.'}
+
+    try:
+        post_id = choice(post_ids) if endpoint in LOADTEST_POST_ENDPOINTS else None
+        response = get_session().request(method, url(post_id), timeout=LOADTEST_TIMEOUT, **kwargs)
+    except requests.Timeout:
+        return endpoint, (time.perf_counter() - scheduled_at) * 1000, 'timeout'
+    except requests.RequestException:
+        return endpoint, (time.perf_counter() - scheduled_at) * 1000, 'connection_error'
+    latency = (time.perf_counter() - scheduled_at) * 1000
+
+    if response.status_code == 401 and method == 'POST':
+        user['access_token'] = api_refresh_token(user['refresh_token'])
+
+    return endpoint, latency, get_outcome(response.status_code)
+
+
+@click.group(invoke_without_command=True)
+@click.option('--concurrency', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of parallel workers sending API requests.')
+@click.option('--bulk', is_flag=True, help='Create posts and likes through bulk API endpoints.')
+@click.pass_context
+def cli(ctx, concurrency, bulk):
     """Automation bot script for testing purposes."""
+    if ctx.invoked_subcommand is not None:
+        return
+
     click.clear()
     click.secho('[Automation Bot]', fg='red')
-    click.secho('v0.1.0', fg='green')
+    click.secho('v0.2.0', fg='green')
     click.echo(
         """
         
@@ -214,18 +424,112 @@ def cli():
 
     option = click.prompt(click.style('Select your option:', fg='green'), default='i', type=str)
     if option == 'c':
-        run()
+        run(concurrency, bulk)
     elif option == 'i':
-        run_interactive()
+        run_interactive(concurrency, bulk)
     else:
         click.secho('Error: option not valid.', fg='red')
 
 
-def run():
+@cli.command()
+@click.option('--rate', default=50.0, show_default=True, type=click.FloatRange(min=0.1),
+              help='Target number of requests per second.')
+@click.option('--duration', default=60.0, show_default=True, type=click.FloatRange(min=1),
+              help='Load test duration in seconds.')
+@click.option('--mix', default=LOADTEST_DEFAULT_MIX, show_default=True,
+              help='Comma-separated `endpoint=weight` pairs of {}.'.format(', '.join(LOADTEST_ENDPOINTS)))
+@click.option('--storage', default='users.json', show_default=True, type=click.Path(exists=True),
+              help='JSON file with fake users and tokens, used for write requests.')
+@click.option('--output', default='loadtest.json', show_default=True, type=click.Path(),
+              help='JSON file to write results to.')
+@click.pass_context
+def loadtest(ctx, rate, duration, mix, storage, output):
+    """Replay a mix of API reads and writes at a target rate and report latencies."""
+
+    weights = parse_mix(mix)
+    concurrency = ctx.parent.params['concurrency']
+
+    with open(storage, 'r') as database:
+        users = list(json.load(database).values())
+    if not users and any(LOADTEST_ENDPOINTS[endpoint][0] == 'POST' for endpoint in weights):
+        raise click.UsageError('storage file `{}` has no users for write requests, run the bot first.'.format(storage))
+
+    post_ids = sample_post_ids()
+    if not post_ids and LOADTEST_POST_ENDPOINTS.intersection(weights):
+        raise click.UsageError('there are no posts to request, run the bot first.')
+
+    click.secho('[Automation Bot] Load test', fg='red')
+    click.echo('Target rate: ' + click.style('{} req/s'.format(rate), fg='green'))
+    click.echo('Duration: ' + click.style('{} s'.format(duration), fg='green'))
+    click.echo('Mix: ' + click.style(mix, fg='green'))
+    click.echo()
+
+    total_requests = int(rate * duration)
+    endpoints = choices(list(weights), weights=list(weights.values()), k=total_requests)
+    samples = []
+
+    started_at = datetime.datetime.now().isoformat()
+    t_start = time.perf_counter()
+    with click.progressbar(
+            length=total_requests,
+            label='Sending requests',
+            show_eta=True,
+            fill_char=click.style('#', fg='green'),
+            bar_template='[ ] %(label)s [%(bar)s] %(info)s'
+    ) as bar:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = []
+            for index, endpoint in enumerate(endpoints):
+                scheduled_at = t_start + index / rate
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(loadtest_request, endpoint, post_ids, users, scheduled_at))
+
+                while futures and futures[0].done():
+                    samples.append(futures.pop(0).result())
+                    bar.update(1)
+
+            for future in futures:
+                samples.append(future.result())
+                bar.update(1)
+    elapsed = time.perf_counter() - t_start
+
+    results = {
+        'started_at': started_at,
+        'config': {'rate': rate, 'duration': duration, 'mix': weights, 'concurrency': concurrency},
+        'elapsed': elapsed,
+        'requests': len(samples),
+        'throughput': len(samples) / elapsed,
+        'error_rate': count_errors(Counter(sample[2] for sample in samples)) / len(samples) if samples else 0,
+        'endpoints': summarize_latencies(samples, elapsed),
+    }
+
+    with open(output, 'w') as output_file:
+        json.dump(results, output_file, indent=4)
+
+    click.echo('\r[{}] Sending requests'.format(click.style('✓', fg='green')))
+    click.echo(
+        ' └─[' + click.style('❢', fg='blue') + '] ' + click.style(str(results['requests']), fg='green')
+        + ' requests in {:.2f}s ({:.1f} req/s), results saved in '.format(elapsed, results['throughput'])
+        + click.style(output, fg='green')
+    )
+    click.echo()
+    click.echo('{:<10} {:>8} {:>8} {:>6} {:>6} {:>8} {:>9} {:>9} {:>9}'.format(
+        'Endpoint', 'Requests', 'Errors', '404', '5xx', 'Timeouts', 'p50, ms', 'p95, ms', 'p99, ms'
+    ))
+    for endpoint, stats in results['endpoints'].items():
+        click.echo('{:<10} {:>8} {:>8} {:>6} {:>6} {:>8} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            endpoint, stats['requests'], stats['errors'], stats['not_found'], stats['server_errors'],
+            stats['timeouts'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms']
+        ))
+
+
+def run(concurrency=1, bulk=False):
     """Run automation bot by provided configuration file."""
     click.clear()
     click.secho('[Automation Bot] Manual mode', fg='red')
-    click.secho('v0.1.0', fg='green')
+    click.secho('v0.2.0', fg='green')
     click.echo()
 
     config = configparser.ConfigParser()
@@ -264,14 +568,15 @@ def run():
         click.secho('Error: `filename` missed in config.ini!', fg='red')
         click.secho('\t Will be used default filename of {}'.format(storage_filename), fg='red')
 
+    click.echo('Concurrency: ' + click.style(str(concurrency), fg='green'))
     click.echo()
 
     t1_start = time.perf_counter()
 
-    signup_users(users_count, storage_filename)
-    update_users(storage_filename)
-    total_posts = create_posts(storage_filename, max_posts)
-    like_posts(storage_filename, max_likes, total_posts)
+    signup_users(users_count, storage_filename, concurrency)
+    update_users(storage_filename, concurrency)
+    total_posts = create_posts(storage_filename, max_posts, concurrency, bulk)
+    like_posts(storage_filename, max_likes, total_posts, concurrency, bulk)
 
     t1_stop = time.perf_counter()
 
@@ -279,11 +584,11 @@ def run():
     click.echo('Total elapsed time: ' + str(total_elapsed_time))
 
 
-def run_interactive():
+def run_interactive(concurrency=1, bulk=False):
     """Run automation bot in interactive mode."""
     click.clear()
     click.secho('[Automation Bot] Interactive mode', fg='red')
-    click.secho('v0.1.0', fg='green')
+    click.secho('v0.2.0', fg='green')
     click.echo()
 
     users_count = click.prompt(click.style('Number of users', fg='green'), type=int)
@@ -294,10 +599,10 @@ def run_interactive():
 
     t1_start = time.perf_counter()
 
-    signup_users(users_count, storage_path)
-    update_users(storage_path)
-    total_posts = create_posts(storage_path, max_posts)
-    like_posts(storage_path, max_likes, total_posts)
+    signup_users(users_count, storage_path, concurrency)
+    update_users(storage_path, concurrency)
+    total_posts = create_posts(storage_path, max_posts, concurrency, bulk)
+    like_posts(storage_path, max_likes, total_posts, concurrency, bulk)
     click.echo()
 
     t1_stop = time.perf_counter()